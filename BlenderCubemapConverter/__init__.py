@@ -12,7 +12,10 @@ bl_info = {
 
 import sys
 import subprocess
+import contextlib
 import importlib
+import json
+import math
 import os
 
 def ExternalModuleInit():#Ensure that initial checks module checks dont fail
@@ -84,6 +87,10 @@ except:
 import bpy
 import numpy as np
 from . import py360convert
+from .output import OutputQueue, write_dds_cubemap
+from .radiance import read_hdr
+from .scan import scan_images
+from .workqueue import WorkQueue
 
 
 def srgb_to_linear(srgb):
@@ -104,352 +111,645 @@ def linear_to_srgb(linear):
     )
     return srgb
 
-def convert_equirectangular_to_cubemap(equirectangular_image_path, separate_alpha_channel):
-    print(f"Processing equirectangular image: {equirectangular_image_path}")
-    try:
-
-        # Load the equirectangular image
+def read_image_pixels(image):
+    """Read an image datablock into a bottom-up [H, W, C] float32 array without a Python list."""
+    width, height = image.size
+    if width == 0 or height == 0:
+        raise ValueError(f"Image {image.name} has no pixel data")
+    pixels = np.empty(len(image.pixels), dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    return pixels.reshape((height, width, -1))
+
+def new_blender_image(name, pixels, float_buffer, colorspace):
+    """Create an image datablock from a bottom-up [H, W, 4] buffer."""
+    height, width, _ = pixels.shape
+    image = bpy.data.images.new(
+        name,
+        width=width,
+        height=height,
+        alpha=True,
+        float_buffer=float_buffer
+    )
+    image.colorspace_settings.name = colorspace
+    image.pixels.foreach_set(np.ascontiguousarray(pixels, dtype=np.float32).ravel())
+    return image
+
+def save_with_blender(path, pixels, output_format, half=True, name="Image", colorspace='Non-Color'):
+    """Save a top-down [H, W, 4] buffer through Blender's image API (main thread only)."""
+    image = new_blender_image(name, np.flipud(pixels), output_format in ('OPEN_EXR', 'HDR'), colorspace)
+    image.use_half_precision = half and output_format == 'OPEN_EXR'
+    image.file_format = output_format
+    image.filepath_raw = path
+    image.save()
+    print(f"Saved image to: {path}")
+
+def load_image_pixels(image_path, max_width=None, keep_image=True):
+    """
+    Load an image file into linear float32 RGB and alpha arrays (rows bottom-up).
+
+    With max_width, wider images are decimated by a whole-pixel stride right
+    after reading, before any further processing. Without keep_image the
+    loaded datablock is removed again. Radiance .hdr files are decoded
+    natively and never create a datablock.
+
+    Returns (rgb, alpha, ext, is_linear, output_format), or None if the image
+    could not be loaded.
+    """
+    ext = os.path.splitext(image_path)[1].lower()
+    if ext == '.hdr':
+        # Radiance files are decoded natively, streaming scanlines instead of
+        # going through a Blender datablock
         try:
-            equirect_image = bpy.data.images.load(equirectangular_image_path)
+            pixels = np.flipud(read_hdr(image_path, max_width))
+        except (OSError, ValueError) as e:
+            print(f"Failed to load image {image_path}: {e}")
+            return None
+        print("Image loaded successfully.")
+        is_linear = True
+        output_format = 'HDR'
+    else:
+        # Load the image
+        try:
+            image = bpy.data.images.load(image_path)
         except Exception as e:
-            print(f"Failed to load image {equirectangular_image_path}: {e}")
-            return
+            print(f"Failed to load image {image_path}: {e}")
+            return None
 
         print("Image loaded successfully.")
 
         # Determine the image color space and format based on file extension
-        ext = os.path.splitext(equirectangular_image_path)[1].lower()
-        if ext in ['.exr', '.hdr']:
+        if ext == '.exr':
             is_linear = True
             output_format = 'OPEN_EXR'
-            equirect_image.colorspace_settings.name = 'Non-Color'
-        elif ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
+            image.colorspace_settings.name = 'Non-Color'
+        elif ext in ['.png', '.jpg', '.jpeg', '.tiff', '.tif', '.bmp']:
             is_linear = False
             output_format = ext.replace('.', '').upper()
             if output_format == 'JPG':
                 output_format = 'JPEG'
             elif output_format == 'TIF':
                 output_format = 'TIFF'
-            equirect_image.colorspace_settings.name = 'Non-Color'  # Load without color management
+            image.colorspace_settings.name = 'Non-Color'  # Load without color management
         else:
             print(f"Unsupported input image format: {ext}")
-            return
-
-        width, height = equirect_image.size
-        channels = len(equirect_image.pixels) // (width * height)
-
-        print(f"Image size: width={width}, height={height}, channels={channels}")
-
-        # Read the pixels and reshape
-        equirect_pixels = np.array(equirect_image.pixels[:]).reshape((height, width, channels)).astype(np.float32)
-        equirect_pixels = equirect_pixels[:, :, :4]  # Ensure RGBA
-
-        # Convert sRGB to linear if necessary
+            return None
+
+        # Read the pixels
+        pixels = read_image_pixels(image)
+        if not keep_image:
+            bpy.data.images.remove(image)
+    if max_width is not None and pixels.shape[1] > max_width:
+        stride = -(-pixels.shape[1] // max_width)
+        pixels = np.ascontiguousarray(pixels[::stride, ::stride])
+    height, width, channels = pixels.shape
+
+    print(f"Image size: width={width}, height={height}, channels={channels}")
+
+    pixels = pixels[:, :, :4]  # Ensure RGBA
+
+    # Convert sRGB to linear if necessary
+    if not is_linear:
+        print("Converting from sRGB to linear color space.")
+        pixels[:, :, :3] = srgb_to_linear(pixels[:, :, :3])
+
+    # Separate alpha channel if needed
+    if channels == 4:
+        alpha = pixels[:, :, 3]
+    else:
+        alpha = np.ones((height, width), dtype=np.float32)
+    rgb = pixels[:, :, :3]
+
+    return rgb, alpha, ext, is_linear, output_format
+
+def output_path(source_path, suffix, ext):
+    """Path of a conversion result written next to its source image."""
+    dir_name = os.path.dirname(source_path)
+    base_name = os.path.basename(source_path)
+    file_name, _ = os.path.splitext(base_name)
+    return os.path.join(dir_name, f"{file_name}_{suffix}{ext}")
+
+def write_stats_sidecar(source_path, suffix, rgb_equirect):
+    """Write HDR statistics of a linear bottom-up equirectangular buffer as a JSON sidecar."""
+    # Statistics use py360convert's top-down orientation for directions
+    stats = py360convert.equirect_stats(np.flipud(rgb_equirect))
+    stats_path = output_path(source_path, f"{suffix}_stats", ".json")
+    with open(stats_path, 'w') as f:
+        json.dump(stats, f, indent=2)
+    print(f"Saved statistics to: {stats_path}")
+
+def load_existing_output(source_path, suffix, ext, separate_alpha_channel, shape):
+    """Load a previous conversion result as linear RGB and alpha, or None if there is no usable one."""
+    if separate_alpha_channel:
+        paths = [output_path(source_path, f"{suffix}_rgb", ext), output_path(source_path, f"{suffix}_alpha", ext)]
+    else:
+        paths = [output_path(source_path, suffix, ext)]
+    if not all(os.path.exists(path) for path in paths):
+        print(f"No previous output found for {source_path}, converting everything.")
+        return None
+
+    loaded = [load_image_pixels(path) for path in paths]
+    if any(l is None for l in loaded) or loaded[0][1].shape != shape:
+        print(f"Previous output for {source_path} does not match, converting everything.")
+        return None
+
+    rgb, alpha, _, is_linear, _ = loaded[0]
+    if separate_alpha_channel:
+        alpha = loaded[1][0][:, :, 0]
+        # Alpha images are written without the sRGB transfer
         if not is_linear:
-            print("Converting from sRGB to linear color space.")
-            equirect_pixels[:, :, :3] = srgb_to_linear(equirect_pixels[:, :, :3])
-
-        # Separate alpha channel if needed
-        if channels == 4:
-            alpha_equirect = equirect_pixels[:, :, 3]
-            rgb_equirect = equirect_pixels[:, :, :3]
-        else:
-            alpha_equirect = np.ones((height, width), dtype=np.float32)
-            rgb_equirect = equirect_pixels[:, :, :3]
-
-        # Determine face width based on the width of the equirectangular image
-        face_w = width // 4
+            alpha = linear_to_srgb(alpha)
+    return rgb, alpha
+
+def blender_faces(faces):
+    """Map face keys to py360convert's, whose up and down are swapped on Blender's bottom-up rows."""
+    if faces is None:
+        return None
+    return [{'U': 'D', 'D': 'U'}.get(k, k) for k in faces]
+
+def queue_outputs(output_queue, source_path, suffix, title, rgb, alpha, ext, output_format, is_linear, separate_alpha_channel):
+    """Encode linear RGB and alpha results for output and queue them for writing."""
+    # Convert linear to sRGB if saving in sRGB format
+    if not is_linear:
+        print("Converting from linear to sRGB color space for output.")
+        rgb = linear_to_srgb(rgb)
+
+    # Clamp values between 0 and 1 for 8-bit formats
+    if output_format in ['PNG', 'JPEG', 'TIFF', 'BMP']:
+        rgb = np.clip(rgb, 0.0, 1.0)
+
+    # Hand the finished buffers to the output queue, which encodes and writes
+    # them while the caller moves on. Blender stores pixel rows bottom-up.
+    colorspace = 'sRGB' if not is_linear else 'Non-Color'
+
+    if separate_alpha_channel:
+        # Combine RGB channels with alpha channel set to 1
+        rgb_alpha = np.dstack((rgb, np.ones_like(alpha)))
+        rgb_image_path = output_path(source_path, f"{suffix}_rgb", ext)
+        output_queue.submit(rgb_image_path, np.flipud(rgb_alpha), output_format,
+                            name=f"{title} RGB Image", colorspace=colorspace)
+
+        # Replace RGB channels with alpha data, set alpha channel to 1
+        alpha_rgb = np.dstack((alpha, alpha, alpha, np.ones_like(alpha)))
+        alpha_image_path = output_path(source_path, f"{suffix}_alpha", ext)
+        output_queue.submit(alpha_image_path, np.flipud(alpha_rgb), output_format,
+                            name=f"{title} Alpha Image", colorspace='Non-Color')
+
+    else:
+        # Combine RGB and alpha channels
+        rgba = np.dstack((rgb, alpha))
+        image_path = output_path(source_path, suffix, ext)
+        output_queue.submit(image_path, np.flipud(rgba), output_format,
+                            name=f"{title} Image", colorspace=colorspace)
+
+@contextlib.contextmanager
+def conversion_output_queue(output_queue=None):
+    """
+    Yield (output_queue, failed) for one conversion. Without a shared queue
+    one is created and closed on exit, adding its failed writes to failed
+    and releasing the remap plans. Batches that pass their own queue check
+    its failures and release the plans once at the end.
+    """
+    own_queue = output_queue is None
+    if own_queue:
+        output_queue = OutputQueue(fallback=save_with_blender)
+    failed = []
+    try:
+        yield output_queue, failed
+    finally:
+        if own_queue:
+            failed += output_queue.close()[1]
+            py360convert.clear_plan_cache()
+
+def convert_equirectangular_to_cubemap(equirectangular_image_path, separate_alpha_channel, output_queue=None,
+                                       faces=None, update_in_place=False, analyze=False):
+    """
+    faces: optional subset of 'F', 'R', 'B', 'L', 'U', 'D' to convert. The
+    other faces are left empty, or kept from the previous output with
+    update_in_place.
+    analyze: also write luminance statistics of the source as a JSON sidecar.
+    Returns False if the conversion or, with its own output queue, a write failed.
+    """
+    print(f"Processing equirectangular image: {equirectangular_image_path}")
+    with conversion_output_queue(output_queue) as (output_queue, failed):
+        try:
+            loaded = load_image_pixels(equirectangular_image_path)
+            if loaded is None:
+                return False
+            rgb_equirect, alpha_equirect, ext, is_linear, output_format = loaded
+            width = rgb_equirect.shape[1]
+
+            # Determine face width based on the width of the equirectangular image
+            face_w = width // 4
+
+            # Convert RGB equirectangular to cubemap
+            e2c_faces = blender_faces(faces)
+            cube_rgb = py360convert.e2c(rgb_equirect, face_w=face_w, cube_format='dice', faces=e2c_faces)
+
+            # Convert alpha equirectangular to cubemap
+            alpha_equirect_expanded = np.stack([alpha_equirect]*3, axis=-1)
+            cube_alpha = py360convert.e2c(alpha_equirect_expanded, face_w=face_w, cube_format='dice', faces=e2c_faces)[:, :, 0]
+
+            # Patch the converted faces into the previous result
+            if update_in_place and faces is not None:
+                existing = load_existing_output(equirectangular_image_path, "cubemap", ext,
+                                                separate_alpha_channel, cube_alpha.shape)
+                if existing is not None:
+                    mask_h = np.zeros((face_w, face_w * 6, 1), bool)
+                    for i in py360convert.cube_face_ids(e2c_faces):
+                        mask_h[:, i*face_w:(i+1)*face_w] = True
+                    mask = py360convert.cube_h2dice(mask_h)[:, :, 0]
+                    existing_rgb, existing_alpha = existing
+                    existing_rgb[mask] = cube_rgb[mask]
+                    existing_alpha[mask] = cube_alpha[mask]
+                    cube_rgb, cube_alpha = existing_rgb, existing_alpha
+
+            # Statistics come from the pixels already in memory, no second decode
+            if analyze:
+                write_stats_sidecar(equirectangular_image_path, "cubemap", rgb_equirect)
+
+            queue_outputs(output_queue, equirectangular_image_path, "cubemap", "Cubemap",
+                          cube_rgb, cube_alpha, ext, output_format, is_linear, separate_alpha_channel)
+        except Exception as e:
+            print(f"An error occurred during conversion: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    return not failed
+
+
+def convert_cubemap_to_equirectangular(cubemap_image_path, separate_alpha_channel, output_queue=None,
+                                       roi=None, update_in_place=False, analyze=False):
+    """
+    roi: optional (top, bottom, left, right) region of the output as
+    fractions of its height and width. Only that region is converted. The
+    rest is left empty, or kept from the previous output with
+    update_in_place.
+    analyze: also write luminance statistics of the result as a JSON sidecar.
+    Skipped when only a region was converted and no previous output filled
+    the rest, since the statistics would cover the empty part as well.
+    Returns False if the conversion or, with its own output queue, a write failed.
+    """
+    print(f"Processing cubemap image: {cubemap_image_path}")
+    with conversion_output_queue(output_queue) as (output_queue, failed):
+        try:
+            loaded = load_image_pixels(cubemap_image_path)
+            if loaded is None:
+                return False
+            rgb_cubemap, alpha_cubemap, ext, is_linear, output_format = loaded
+            height, width = alpha_cubemap.shape
+
+            # Determine output dimensions
+            equirect_width = width // 4 * 8  # Equirectangular width is typically 2:1 ratio
+            equirect_height = height // 3 * 4
+
+            # Region in pixels; rows are flipped since Blender stores them bottom-up
+            if roi is not None:
+                top, bottom, left, right = roi
+                c2e_roi = (
+                    equirect_height - int(round(bottom * equirect_height)),
+                    equirect_height - int(round(top * equirect_height)),
+                    int(round(left * equirect_width)),
+                    int(round(right * equirect_width)),
+                )
+            else:
+                c2e_roi = None
+
+            # Convert RGB cubemap to equirectangular
+            equirect_rgb = py360convert.c2e(rgb_cubemap, h=equirect_height, w=equirect_width, cube_format='dice', roi=c2e_roi)
+
+            # Convert alpha cubemap to equirectangular
+            alpha_cubemap_expanded = np.stack([alpha_cubemap]*3, axis=-1)
+            equirect_alpha = py360convert.c2e(alpha_cubemap_expanded, h=equirect_height, w=equirect_width, cube_format='dice', roi=c2e_roi)[:, :, 0]
+
+            # Place the region into the previous result, or an empty image
+            complete = True
+            if c2e_roi is not None:
+                existing = None
+                if update_in_place:
+                    existing = load_existing_output(cubemap_image_path, "equirectangular", ext,
+                                                    separate_alpha_channel, (equirect_height, equirect_width))
+                if existing is None:
+                    complete = False
+                    existing = (np.zeros((equirect_height, equirect_width, 3), np.float32),
+                                np.zeros((equirect_height, equirect_width), np.float32))
+                region_top, region_bottom, region_left, region_right = c2e_roi
+                full_rgb, full_alpha = existing
+                full_rgb[region_top:region_bottom, region_left:region_right] = equirect_rgb
+                full_alpha[region_top:region_bottom, region_left:region_right] = equirect_alpha
+                equirect_rgb, equirect_alpha = full_rgb, full_alpha
+
+            # Statistics come from the pixels already in memory, no second decode
+            if analyze and complete:
+                write_stats_sidecar(cubemap_image_path, "equirectangular", equirect_rgb)
+            elif analyze:
+                print(f"Only a region of {cubemap_image_path} was converted, skipping statistics.")
+
+            queue_outputs(output_queue, cubemap_image_path, "equirectangular", "Equirectangular",
+                          equirect_rgb, equirect_alpha, ext, output_format, is_linear, separate_alpha_channel)
+        except Exception as e:
+            print(f"An error occurred during conversion: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    return not failed
 
-        # Convert RGB equirectangular to cubemap
-        cube_rgb = py360convert.e2c(rgb_equirect, face_w=face_w, cube_format='dice')
 
-        # Convert alpha equirectangular to cubemap
-        alpha_equirect_expanded = np.stack([alpha_equirect]*3, axis=-1)
-        cube_alpha = py360convert.e2c(alpha_equirect_expanded, face_w=face_w, cube_format='dice')[:, :, 0]
+def rotate_cubemap(cubemap_image_path, yaw_deg, pitch_deg, roll_deg, separate_alpha_channel, output_queue=None):
+    print(f"Rotating cubemap image: {cubemap_image_path}")
+    with conversion_output_queue(output_queue) as (output_queue, failed):
+        try:
+            loaded = load_image_pixels(cubemap_image_path)
+            if loaded is None:
+                return False
+            rgb_cubemap, alpha_cubemap, ext, is_linear, output_format = loaded
 
-        # Convert linear to sRGB if saving in sRGB format
-        if not is_linear:
-            print("Converting from linear to sRGB color space for output.")
-            cube_rgb = linear_to_srgb(cube_rgb)
+            # Remap RGB and alpha together, straight from cube faces to cube faces
+            rgba_cubemap = np.dstack((rgb_cubemap, alpha_cubemap))
+            rotated = py360convert.c2c(rgba_cubemap, yaw_deg, pitch_deg, roll_deg, cube_format='dice')
 
-        # Clamp values between 0 and 1 for 8-bit formats
-        if output_format in ['PNG', 'JPEG', 'TIFF', 'BMP']:
-            cube_rgb = np.clip(cube_rgb, 0.0, 1.0)
+            queue_outputs(output_queue, cubemap_image_path, "rotated", "Rotated Cubemap",
+                          rotated[:, :, :3], rotated[:, :, 3], ext, output_format, is_linear, separate_alpha_channel)
+        except Exception as e:
+            print(f"An error occurred during rotation: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    return not failed
 
-        # Get dimensions from cube_rgb
-        height_c, width_c, _ = cube_rgb.shape
 
-        # Determine float_buffer and use_half_precision settings
-        if output_format == 'OPEN_EXR':
-            float_buffer = True
-            use_half_precision = True
+def export_equirectangular_to_dds(equirectangular_image_path):
+    """Write an equirectangular image as a DDS cubemap with mips, ready for engine upload."""
+    print(f"Processing equirectangular image: {equirectangular_image_path}")
+    try:
+        loaded = load_image_pixels(equirectangular_image_path)
+        if loaded is None:
+            return False
+        rgb_equirect, alpha_equirect, ext, is_linear, _ = loaded
+        face_w = rgb_equirect.shape[1] // 4
+
+        # py360convert's face orientation assumes top-down rows
+        rgba_equirect = np.flipud(np.dstack((rgb_equirect, alpha_equirect)))
+        cube_h = py360convert.e2c(rgba_equirect, face_w=face_w, cube_format='horizon')
+
+        dds_path = output_path(equirectangular_image_path, "cubemap", ".dds")
+        if is_linear:
+            write_dds_cubemap(dds_path, cube_h, 'float16')
         else:
-            float_buffer = False
-            use_half_precision = False
-
-        if separate_alpha_channel:
-            # Create RGB cubemap image with alpha channel set to 1
-            cube_rgb_image = bpy.data.images.new(
-                "Cubemap RGB Image",
-                width=width_c,
-                height=height_c,
-                alpha=True,
-                float_buffer=float_buffer
-            )
-            cube_rgb_image.use_half_precision = use_half_precision
-            cube_rgb_image.file_format = output_format
-            cube_rgb_image.colorspace_settings.name = 'sRGB' if not is_linear else 'Non-Color'
-
-            # Combine RGB channels with alpha channel set to 1
-            cube_rgb_alpha = np.dstack((cube_rgb, np.ones_like(cube_alpha)))
-
-            # Flatten and assign pixels
-            cube_rgb_image.pixels = cube_rgb_alpha.flatten().tolist()
-
-            # Save the RGB cubemap image
-            dir_name = os.path.dirname(equirectangular_image_path)
-            base_name = os.path.basename(equirectangular_image_path)
-            file_name, _ = os.path.splitext(base_name)
-            cube_rgb_file_name = f"{file_name}_cubemap_rgb{ext}"
-            cube_rgb_image_path = os.path.join(dir_name, cube_rgb_file_name)
-            cube_rgb_image.filepath_raw = cube_rgb_image_path
-            cube_rgb_image.save()
-
-            print(f"Saved RGB cubemap image to: {cube_rgb_image_path}")
-
-            # Create Alpha cubemap image with alpha channel set to 1
-            cube_alpha_image = bpy.data.images.new(
-                "Cubemap Alpha Image",
-                width=width_c,
-                height=height_c,
-                alpha=True,
-                float_buffer=float_buffer
-            )
-            cube_alpha_image.use_half_precision = use_half_precision
-            cube_alpha_image.file_format = output_format
-            cube_alpha_image.colorspace_settings.name = 'Non-Color'  # Alpha is linear
-
-            # Replace RGB channels with alpha data, set alpha channel to 1
-            cube_alpha_rgb = np.dstack((cube_alpha, cube_alpha, cube_alpha, np.ones_like(cube_alpha)))
-
-            # Flatten and assign pixels
-            cube_alpha_image.pixels = cube_alpha_rgb.flatten().tolist()
-
-            # Save the Alpha cubemap image
-            cube_alpha_file_name = f"{file_name}_cubemap_alpha{ext}"
-            cube_alpha_image_path = os.path.join(dir_name, cube_alpha_file_name)
-            cube_alpha_image.filepath_raw = cube_alpha_image_path
-            cube_alpha_image.save()
-
-            print(f"Saved Alpha cubemap image to: {cube_alpha_image_path}")
+            write_dds_cubemap(dds_path, cube_h, 'rgba8_srgb', encode=linear_to_srgb)
 
-        else:
-            # Combine RGB and alpha channels
-            cube_rgba = np.dstack((cube_rgb, cube_alpha))
-
-            # Create combined cubemap image
-            cubemap_image = bpy.data.images.new(
-                "Cubemap Image",
-                width=width_c,
-                height=height_c,
-                alpha=True,
-                float_buffer=float_buffer
-            )
-            cubemap_image.use_half_precision = use_half_precision
-            cubemap_image.file_format = output_format
-            cubemap_image.colorspace_settings.name = 'sRGB' if not is_linear else 'Non-Color'
-
-            # Flatten and assign pixels
-            cubemap_image.pixels = cube_rgba.flatten().tolist()
-
-            # Save the image
-            dir_name = os.path.dirname(equirectangular_image_path)
-            base_name = os.path.basename(equirectangular_image_path)
-            file_name, _ = os.path.splitext(base_name)
-            cubemap_file_name = f"{file_name}_cubemap{ext}"
-            cubemap_image_path = os.path.join(dir_name, cubemap_file_name)
-            cubemap_image.filepath_raw = cubemap_image_path
-            cubemap_image.save()
-
-            print(f"Saved cubemap image to: {cubemap_image_path}")
+        print(f"Saved DDS cubemap to: {dds_path}")
+        return True
 
     except Exception as e:
-        print(f"An error occurred during conversion: {e}")
+        print(f"An error occurred during export: {e}")
         import traceback
         traceback.print_exc()
+        return False
+    finally:
+        py360convert.clear_plan_cache()
 
 
-def convert_cubemap_to_equirectangular(cubemap_image_path, separate_alpha_channel):
-    print(f"Processing cubemap image: {cubemap_image_path}")
-    try:
-
-        # Load the cubemap image
+def convert_equirectangular_to_octahedral(equirectangular_image_path, separate_alpha_channel, output_queue=None,
+                                          equal_area=False):
+    print(f"Processing equirectangular image: {equirectangular_image_path}")
+    with conversion_output_queue(output_queue) as (output_queue, failed):
         try:
-            cubemap_image = bpy.data.images.load(cubemap_image_path)
-        except Exception as e:
-            print(f"Failed to load image {cubemap_image_path}: {e}")
-            return
-
-        print("Image loaded successfully.")
-
-        # Determine the image color space and format based on file extension
-        ext = os.path.splitext(cubemap_image_path)[1].lower()
-        if ext in ['.exr', '.hdr']:
-            is_linear = True
-            output_format = 'OPEN_EXR'
-            cubemap_image.colorspace_settings.name = 'Non-Color'
-        elif ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
-            is_linear = False
-            output_format = ext.replace('.', '').upper()
-            if output_format == 'JPG':
-                output_format = 'JPEG'
-            elif output_format == 'TIF':
-                output_format = 'TIFF'
-            cubemap_image.colorspace_settings.name = 'Non-Color'  # Load without color management
-        else:
-            print(f"Unsupported input image format: {ext}")
-            return
+            loaded = load_image_pixels(equirectangular_image_path)
+            if loaded is None:
+                return False
+            rgb_equirect, alpha_equirect, ext, is_linear, output_format = loaded
 
-        width, height = cubemap_image.size
-        channels = len(cubemap_image.pixels) // (width * height)
+            # Same angular resolution as a cubemap with face_w = width // 4
+            size = rgb_equirect.shape[1] // 2
 
-        print(f"Image size: width={width}, height={height}, channels={channels}")
+            rgba_equirect = np.dstack((rgb_equirect, alpha_equirect))
+            octa = py360convert.e2o(rgba_equirect, size=size, equal_area=equal_area)
 
-        # Read the pixels and reshape
-        cubemap_pixels = np.array(cubemap_image.pixels[:]).reshape((height, width, channels)).astype(np.float32)
-        cubemap_pixels = cubemap_pixels[:, :, :4]  # Ensure RGBA
-
-        # Convert sRGB to linear if necessary
-        if not is_linear:
-            print("Converting from sRGB to linear color space.")
-            cubemap_pixels[:, :, :3] = srgb_to_linear(cubemap_pixels[:, :, :3])
-
-        # Separate alpha channel if needed
-        if channels == 4:
-            alpha_cubemap = cubemap_pixels[:, :, 3]
-            rgb_cubemap = cubemap_pixels[:, :, :3]
-        else:
-            alpha_cubemap = np.ones((height, width), dtype=np.float32)
-            rgb_cubemap = cubemap_pixels[:, :, :3]
-
-        # Determine output dimensions
-        equirect_width = width // 4 * 8  # Equirectangular width is typically 2:1 ratio
-        equirect_height = height // 3 * 4
+            queue_outputs(output_queue, equirectangular_image_path, "octahedral", "Octahedral",
+                          octa[:, :, :3], octa[:, :, 3], ext, output_format, is_linear, separate_alpha_channel)
+        except Exception as e:
+            print(f"An error occurred during conversion: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    return not failed
 
-        # Convert RGB cubemap to equirectangular
-        equirect_rgb = py360convert.c2e(rgb_cubemap, h=equirect_height, w=equirect_width, cube_format='dice')
 
-        # Convert alpha cubemap to equirectangular
-        alpha_cubemap_expanded = np.stack([alpha_cubemap]*3, axis=-1)
-        equirect_alpha = py360convert.c2e(alpha_cubemap_expanded, h=equirect_height, w=equirect_width, cube_format='dice')[:, :, 0]
+def convert_octahedral_to_equirectangular(octahedral_image_path, separate_alpha_channel, output_queue=None,
+                                          equal_area=False):
+    print(f"Processing octahedral image: {octahedral_image_path}")
+    with conversion_output_queue(output_queue) as (output_queue, failed):
+        try:
+            loaded = load_image_pixels(octahedral_image_path)
+            if loaded is None:
+                return False
+            rgb_octa, alpha_octa, ext, is_linear, output_format = loaded
+            size = rgb_octa.shape[0]
 
-        # Convert linear to sRGB if saving in sRGB format
-        if not is_linear:
-            print("Converting from linear to sRGB color space for output.")
-            equirect_rgb = linear_to_srgb(equirect_rgb)
+            rgba_octa = np.dstack((rgb_octa, alpha_octa))
+            equirect = py360convert.o2e(rgba_octa, h=size, w=size * 2, equal_area=equal_area)
 
-        # Clamp values between 0 and 1 for 8-bit formats
-        if output_format in ['PNG', 'JPEG', 'TIFF', 'BMP']:
-            equirect_rgb = np.clip(equirect_rgb, 0.0, 1.0)
+            queue_outputs(output_queue, octahedral_image_path, "equirectangular", "Equirectangular",
+                          equirect[:, :, :3], equirect[:, :, 3], ext, output_format, is_linear, separate_alpha_channel)
+        except Exception as e:
+            print(f"An error occurred during conversion: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    return not failed
+
+
+# Source each preview datablock currently holds, by datablock name:
+# (source path, modification time, direction)
+_preview_cache = {}
+
+PREVIEW_FACE_W = 256
+
+def build_preview(image_path, direction):
+    """
+    Convert a decimated read of an image into a small in-memory preview.
+
+    direction is 'CUBEMAP' (equirectangular source) or 'EQUIRECTANGULAR'
+    (cubemap source). The last preview of each direction is reused while its
+    source path and mtime are unchanged. Returns None if the image could
+    not be previewed.
+    """
+    key = (image_path, os.path.getmtime(image_path), direction)
+    name = f"Cubemap Tool Preview ({direction.title()})"
+    # Both directions reuse one datablock each, so check which source it holds
+    if _preview_cache.get(name) == key and name in bpy.data.images:
+        return bpy.data.images[name]
 
-        # Determine float_buffer and use_half_precision settings
-        if output_format == 'OPEN_EXR':
-            float_buffer = True
-            use_half_precision = True
+    try:
+        # Read at twice the resolution the preview needs, sampling stays cheap
+        loaded = load_image_pixels(image_path, max_width=PREVIEW_FACE_W * 8, keep_image=False)
+        if loaded is None:
+            return None
+        rgb, alpha, _, is_linear, _ = loaded
+        rgba = np.dstack((rgb, alpha))
+
+        if direction == 'CUBEMAP':
+            result = py360convert.e2c(rgba, face_w=PREVIEW_FACE_W, cube_format='dice')
         else:
-            float_buffer = False
-            use_half_precision = False
-
-        if separate_alpha_channel:
-            # Create RGB equirectangular image with alpha channel set to 1
-            equirect_rgb_image = bpy.data.images.new(
-                "Equirectangular RGB Image",
-                width=equirect_width,
-                height=equirect_height,
-                alpha=True,
-                float_buffer=float_buffer
-            )
-            equirect_rgb_image.use_half_precision = use_half_precision
-            equirect_rgb_image.file_format = output_format
-            equirect_rgb_image.colorspace_settings.name = 'sRGB' if not is_linear else 'Non-Color'
-
-            # Combine RGB channels with alpha channel set to 1
-            equirect_rgb_alpha = np.dstack((equirect_rgb, np.ones_like(equirect_alpha)))
-
-            # Flatten and assign pixels
-            equirect_rgb_image.pixels = equirect_rgb_alpha.flatten().tolist()
-
-            # Save the RGB equirectangular image
-            dir_name = os.path.dirname(cubemap_image_path)
-            base_name = os.path.basename(cubemap_image_path)
-            file_name, _ = os.path.splitext(base_name)
-            equirect_rgb_file_name = f"{file_name}_equirectangular_rgb{ext}"
-            equirect_rgb_image_path = os.path.join(dir_name, equirect_rgb_file_name)
-            equirect_rgb_image.filepath_raw = equirect_rgb_image_path
-            equirect_rgb_image.save()
-
-            print(f"Saved RGB equirectangular image to: {equirect_rgb_image_path}")
-
-            # Create Alpha equirectangular image with alpha channel set to 1
-            equirect_alpha_image = bpy.data.images.new(
-                "Equirectangular Alpha Image",
-                width=equirect_width,
-                height=equirect_height,
-                alpha=True,
-                float_buffer=float_buffer
-            )
-            equirect_alpha_image.use_half_precision = use_half_precision
-            equirect_alpha_image.file_format = output_format
-            equirect_alpha_image.colorspace_settings.name = 'Non-Color'  # Alpha is linear
-
-            # Replace RGB channels with alpha data, set alpha channel to 1
-            equirect_alpha_rgb = np.dstack((equirect_alpha, equirect_alpha, equirect_alpha, np.ones_like(equirect_alpha)))
-
-            # Flatten and assign pixels
-            equirect_alpha_image.pixels = equirect_alpha_rgb.flatten().tolist()
-
-            # Save the Alpha equirectangular image
-            equirect_alpha_file_name = f"{file_name}_equirectangular_alpha{ext}"
-            equirect_alpha_image_path = os.path.join(dir_name, equirect_alpha_file_name)
-            equirect_alpha_image.filepath_raw = equirect_alpha_image_path
-            equirect_alpha_image.save()
-
-            print(f"Saved Alpha equirectangular image to: {equirect_alpha_image_path}")
+            result = py360convert.c2e(rgba, h=PREVIEW_FACE_W * 2, w=PREVIEW_FACE_W * 4, cube_format='dice')
 
-        else:
-            # Combine RGB and alpha channels
-            equirect_rgba = np.dstack((equirect_rgb, equirect_alpha))
-
-            # Create combined equirectangular image
-            equirect_image = bpy.data.images.new(
-                "Equirectangular Image",
-                width=equirect_width,
-                height=equirect_height,
-                alpha=True,
-                float_buffer=float_buffer
-            )
-            equirect_image.use_half_precision = use_half_precision
-            equirect_image.file_format = output_format
-            equirect_image.colorspace_settings.name = 'sRGB' if not is_linear else 'Non-Color'
-
-            # Flatten and assign pixels
-            equirect_image.pixels = equirect_rgba.flatten().tolist()
-
-            # Save the image
-            dir_name = os.path.dirname(cubemap_image_path)
-            base_name = os.path.basename(cubemap_image_path)
-            file_name, _ = os.path.splitext(base_name)
-            equirect_file_name = f"{file_name}_equirectangular{ext}"
-            equirect_image_path = os.path.join(dir_name, equirect_file_name)
-            equirect_image.filepath_raw = equirect_image_path
-            equirect_image.save()
-
-            print(f"Saved equirectangular image to: {equirect_image_path}")
+        # Previews are always shown as display-referred bytes
+        result[:, :, :3] = np.clip(linear_to_srgb(np.maximum(result[:, :, :3], 0.0)), 0.0, 1.0)
+        image = store_image_in_memory(name, result, False)
+        # The pixels may have been rewritten in place, regenerate the icon
+        image.preview_ensure()
+        image.preview.reload()
 
+        _preview_cache[name] = key
+        return image
     except Exception as e:
-        print(f"An error occurred during conversion: {e}")
+        print(f"An error occurred while building the preview: {e}")
         import traceback
         traceback.print_exc()
+        return None
+
+def submit_directory_jobs(queue_dir, cubemaps_directory, equirectangulars_directory, separate_alpha_channel):
+    """Add every cubemap and equirectangular image of the directories to a shared work queue."""
+    jobs = []
+    if cubemaps_directory:
+        jobs += [{'operation': 'cubemap_to_equirectangular', 'path': info.path,
+                  'separate_alpha_channel': separate_alpha_channel}
+                 for info in scan_images(cubemaps_directory, layout='dice')]
+    if equirectangulars_directory:
+        jobs += [{'operation': 'equirectangular_to_cubemap', 'path': info.path,
+                  'separate_alpha_channel': separate_alpha_channel}
+                 for info in scan_images(equirectangulars_directory, layout='equirect')]
+    return WorkQueue(queue_dir).submit(jobs)
+
+def run_shared_queue_job(job, lease):
+    """
+    Convert one shared queue job, raising if it failed. Outputs are written
+    to staging files and only moved into place while the job's lease is held.
+    """
+    separate_alpha_channel = job['separate_alpha_channel']
+    if job['operation'] == 'cubemap_to_equirectangular':
+        convert = convert_cubemap_to_equirectangular
+    elif job['operation'] == 'equirectangular_to_cubemap':
+        convert = convert_equirectangular_to_cubemap
+    else:
+        raise ValueError(f"Unknown operation {job['operation']}")
+
+    output_queue = OutputQueue(fallback=save_with_blender, staging=True)
+    try:
+        succeeded = convert(job['path'], separate_alpha_channel, output_queue)
+    finally:
+        _, failed = output_queue.close()
+    if not succeeded or failed:
+        output_queue.discard()
+        raise RuntimeError(f"Conversion of {job['path']} failed")
+    return lease.commit(output_queue.staged)
+
+def run_queue_worker(queue_dir, worker_id=None, wait_for_leases=True):
+    """
+    Process a shared work queue until it is empty. Meant for headless render nodes:
+
+        blender -b --python-expr "import BlenderCubemapConverter as c; c.run_queue_worker('/nas/queue')"
+
+    With wait_for_leases, the worker also waits for jobs other workers hold,
+    so it can take over those of workers that crash.
+    """
+    try:
+        finished = WorkQueue(queue_dir).run_worker(run_shared_queue_job, worker_id,
+                                                   wait_for_leases=wait_for_leases)
+    finally:
+        py360convert.clear_plan_cache()
+    print(f"Worker finished {finished} jobs from {queue_dir}")
+    return finished
+
+def selected_faces(scene):
+    """Cube faces picked in the panel, or None for all of them."""
+    faces = scene.cubemap_faces
+    return None if len(faces) == 6 else faces
+
+def selected_roi(scene):
+    """Equirectangular region picked in the panel, or None for the whole image."""
+    if not scene.use_equirect_roi:
+        return None
+    top, bottom = scene.equirect_roi_rows
+    left, right = scene.equirect_roi_columns
+    return top, bottom, left, right
+
+def world_environment_node(scene):
+    """Environment Texture node of the scene's World, or None."""
+    world = scene.world
+    if world is None or not world.use_nodes:
+        return None
+    for node in world.node_tree.nodes:
+        if node.type == 'TEX_ENVIRONMENT' and node.image is not None:
+            return node
+    return None
+
+def store_image_in_memory(name, pixels, float_buffer, pack=False):
+    """
+    Put a bottom-up [H, W, 4] buffer into an image datablock without touching
+    the disk. An existing datablock of the same name and size is updated in
+    place, so repeated look-dev conversions don't pile up images.
+    """
+    height, width, _ = pixels.shape
+    image = bpy.data.images.get(name)
+    if image is not None and (tuple(image.size) != (width, height) or image.is_float != float_buffer):
+        bpy.data.images.remove(image)
+        image = None
+    colorspace = 'Linear Rec.709' if float_buffer else 'sRGB'
+    if image is None:
+        image = new_blender_image(name, pixels, float_buffer, colorspace)
+    else:
+        image.pixels.foreach_set(np.ascontiguousarray(pixels, dtype=np.float32).ravel())
+        image.update()
+    if pack:
+        image.pack()
+    return image
+
+def convert_image_equirectangular_to_cubemap(image, pack=False):
+    """Convert an equirectangular image datablock into a cubemap datablock in memory."""
+    print(f"Processing equirectangular image datablock: {image.name}")
+    # Float buffers hold linear data, byte buffers hold sRGB encoded values
+    is_linear = image.is_float
+    pixels = read_image_pixels(image)
+    if pixels.shape[2] == 4:
+        rgba = pixels.copy()
+    else:
+        rgba = np.dstack((pixels[:, :, :3], np.ones(pixels.shape[:2], np.float32)))
+    if not is_linear:
+        rgba[:, :, :3] = srgb_to_linear(rgba[:, :, :3])
+
+    cube_rgba = py360convert.e2c(rgba, face_w=rgba.shape[1] // 4, cube_format='dice')
+    py360convert.clear_plan_cache()
+
+    if not is_linear:
+        cube_rgba[:, :, :3] = np.clip(linear_to_srgb(cube_rgba[:, :, :3]), 0.0, 1.0)
+    return store_image_in_memory(f"{image.name}_cubemap", cube_rgba, is_linear, pack)
+
+def convert_image_cubemap_to_equirectangular(image, pack=False):
+    """Convert a cubemap image datablock into an equirectangular datablock in memory."""
+    print(f"Processing cubemap image datablock: {image.name}")
+    is_linear = image.is_float
+    pixels = read_image_pixels(image)
+    if pixels.shape[2] == 4:
+        rgba = pixels.copy()
+    else:
+        rgba = np.dstack((pixels[:, :, :3], np.ones(pixels.shape[:2], np.float32)))
+    if not is_linear:
+        rgba[:, :, :3] = srgb_to_linear(rgba[:, :, :3])
+
+    height, width, _ = rgba.shape
+    equirect_rgba = py360convert.c2e(rgba, h=height // 3 * 4, w=width // 4 * 8, cube_format='dice')
+
+    if not is_linear:
+        equirect_rgba[:, :, :3] = np.clip(linear_to_srgb(equirect_rgba[:, :, :3]), 0.0, 1.0)
+    return store_image_in_memory(f"{image.name}_equirectangular", equirect_rgba, is_linear, pack)
+
+def source_image(scene):
+    """Image picked in the panel, falling back to the World's environment texture."""
+    if scene.source_image is not None:
+        return scene.source_image
+    node = world_environment_node(scene)
+    return node.image if node is not None else None
 
 class ConvertCubemapToEquirectangularOperator(bpy.types.Operator):
     bl_idname = "addon.convert_cubemap"
@@ -458,7 +758,12 @@ class ConvertCubemapToEquirectangularOperator(bpy.types.Operator):
     def execute(self, context):
         cubemap_image_path = context.scene.cubemap_path  # Get the file path from the scene properties
         separate_alpha_channel = context.scene.separate_alpha_channel  # Get the value of the checkbox
-        convert_cubemap_to_equirectangular(cubemap_image_path, separate_alpha_channel)
+        if not convert_cubemap_to_equirectangular(cubemap_image_path, separate_alpha_channel,
+                                                  roi=selected_roi(context.scene),
+                                                  update_in_place=context.scene.update_in_place,
+                                                  analyze=context.scene.write_hdr_stats):
+            self.report({'ERROR'}, f"Failed to convert {cubemap_image_path}, see the console for details")
+            return {'CANCELLED'}
         self.report({'INFO'}, f"Converted {cubemap_image_path} to equirectangular")
         return {'FINISHED'}
 
@@ -470,11 +775,21 @@ class ConvertAllCubemapsToEquirectangularOperator(bpy.types.Operator):
         directory = context.scene.cubemaps_directory  # Get the directory from the scene properties
         separate_alpha_channel = context.scene.separate_alpha_channel  # Get the value of the checkbox
 
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                if file.lower().endswith((".png", ".jpg", ".hdr", ".exr")):
-                    cubemap_image_path = os.path.join(root, file)
-                    convert_cubemap_to_equirectangular(cubemap_image_path, separate_alpha_channel)
+        # Share one output queue so files are written while the next one converts
+        failed = []
+        with OutputQueue(fallback=save_with_blender) as output_queue:
+            # Only headers are read up front, mismatched layouts are never decoded
+            for info in scan_images(directory, layout='dice'):
+                if not convert_cubemap_to_equirectangular(info.path, separate_alpha_channel, output_queue,
+                                                          roi=selected_roi(context.scene),
+                                                          update_in_place=context.scene.update_in_place,
+                                                          analyze=context.scene.write_hdr_stats):
+                    failed.append(info.path)
+        py360convert.clear_plan_cache()
+        failed += output_queue.failed
+        if failed:
+            self.report({'ERROR'}, f"Failed to convert or write {len(failed)} images in {directory}, see the console for details")
+            return {'FINISHED'}
         self.report({'INFO'}, f"Converted all cubemaps in {directory} to equirectangular")
         return {'FINISHED'}
 
@@ -485,7 +800,15 @@ class ConvertEquirectangularToCubemapOperator(bpy.types.Operator):
     def execute(self, context):
         equirectangular_image_path = context.scene.equirectangular_path  # Get the file path from the scene properties
         separate_alpha_channel = context.scene.separate_alpha_channel  # Get the value of the checkbox
-        convert_equirectangular_to_cubemap(equirectangular_image_path, separate_alpha_channel)
+        if not context.scene.cubemap_faces:
+            self.report({'ERROR'}, "No cube faces selected")
+            return {'CANCELLED'}
+        if not convert_equirectangular_to_cubemap(equirectangular_image_path, separate_alpha_channel,
+                                                  faces=selected_faces(context.scene),
+                                                  update_in_place=context.scene.update_in_place,
+                                                  analyze=context.scene.write_hdr_stats):
+            self.report({'ERROR'}, f"Failed to convert {equirectangular_image_path}, see the console for details")
+            return {'CANCELLED'}
         self.report({'INFO'}, f"Converted {equirectangular_image_path} to cubemap")
         return {'FINISHED'}
 
@@ -496,15 +819,188 @@ class ConvertAllEquirectangularsToCubemapOperator(bpy.types.Operator):
     def execute(self, context):
         directory = context.scene.equirectangulars_directory  # Get the directory from the scene properties
         separate_alpha_channel = context.scene.separate_alpha_channel  # Get the value of the checkbox
-
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                if file.lower().endswith((".png", ".jpg", ".hdr", ".exr")):
-                    equirectangular_image_path = os.path.join(root, file)
-                    convert_equirectangular_to_cubemap(equirectangular_image_path, separate_alpha_channel)
+        if not context.scene.cubemap_faces:
+            self.report({'ERROR'}, "No cube faces selected")
+            return {'CANCELLED'}
+
+        # Share one output queue so files are written while the next one converts
+        failed = []
+        with OutputQueue(fallback=save_with_blender) as output_queue:
+            # Only headers are read up front, mismatched layouts are never decoded
+            for info in scan_images(directory, layout='equirect'):
+                if not convert_equirectangular_to_cubemap(info.path, separate_alpha_channel, output_queue,
+                                                          faces=selected_faces(context.scene),
+                                                          update_in_place=context.scene.update_in_place,
+                                                          analyze=context.scene.write_hdr_stats):
+                    failed.append(info.path)
+        py360convert.clear_plan_cache()
+        failed += output_queue.failed
+        if failed:
+            self.report({'ERROR'}, f"Failed to convert or write {len(failed)} images in {directory}, see the console for details")
+            return {'FINISHED'}
         self.report({'INFO'}, f"Converted all equirectangulars in {directory} to cubemap")
         return {'FINISHED'}
 
+class RotateCubemapOperator(bpy.types.Operator):
+    bl_idname = "addon.rotate_cubemap"
+    bl_label = "Rotate Cubemap"
+
+    def execute(self, context):
+        cubemap_image_path = context.scene.cubemap_path  # Get the file path from the scene properties
+        separate_alpha_channel = context.scene.separate_alpha_channel  # Get the value of the checkbox
+        if not rotate_cubemap(
+            cubemap_image_path,
+            math.degrees(context.scene.cubemap_yaw),
+            math.degrees(context.scene.cubemap_pitch),
+            math.degrees(context.scene.cubemap_roll),
+            separate_alpha_channel
+        ):
+            self.report({'ERROR'}, f"Failed to rotate {cubemap_image_path}, see the console for details")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Rotated {cubemap_image_path}")
+        return {'FINISHED'}
+
+class ExportEquirectangularToDDSOperator(bpy.types.Operator):
+    bl_idname = "addon.export_equirectangular_dds"
+    bl_label = "Export Equirectangular as DDS Cubemap"
+
+    def execute(self, context):
+        equirectangular_image_path = context.scene.equirectangular_path  # Get the file path from the scene properties
+        if not export_equirectangular_to_dds(equirectangular_image_path):
+            self.report({'ERROR'}, f"Failed to export {equirectangular_image_path}, see the console for details")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Exported {equirectangular_image_path} as DDS cubemap")
+        return {'FINISHED'}
+
+class ConvertEquirectangularToOctahedralOperator(bpy.types.Operator):
+    bl_idname = "addon.convert_equirectangular_octahedral"
+    bl_label = "Convert Equirectangular to Octahedral"
+
+    def execute(self, context):
+        equirectangular_image_path = context.scene.equirectangular_path  # Get the file path from the scene properties
+        separate_alpha_channel = context.scene.separate_alpha_channel  # Get the value of the checkbox
+        if not convert_equirectangular_to_octahedral(equirectangular_image_path, separate_alpha_channel,
+                                                     equal_area=context.scene.octahedral_equal_area):
+            self.report({'ERROR'}, f"Failed to convert {equirectangular_image_path}, see the console for details")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Converted {equirectangular_image_path} to octahedral")
+        return {'FINISHED'}
+
+class ConvertOctahedralToEquirectangularOperator(bpy.types.Operator):
+    bl_idname = "addon.convert_octahedral"
+    bl_label = "Convert Octahedral to Equirectangular"
+
+    def execute(self, context):
+        octahedral_image_path = context.scene.octahedral_path  # Get the file path from the scene properties
+        separate_alpha_channel = context.scene.separate_alpha_channel  # Get the value of the checkbox
+        if not convert_octahedral_to_equirectangular(octahedral_image_path, separate_alpha_channel,
+                                                     equal_area=context.scene.octahedral_equal_area):
+            self.report({'ERROR'}, f"Failed to convert {octahedral_image_path}, see the console for details")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Converted {octahedral_image_path} to equirectangular")
+        return {'FINISHED'}
+
+class PreviewConversionOperator(bpy.types.Operator):
+    bl_idname = "addon.preview_conversion"
+    bl_label = "Preview Conversion"
+
+    direction: bpy.props.EnumProperty(
+        items=[
+            ('CUBEMAP', "Cubemap", "Preview the equirectangular image as a cubemap"),
+            ('EQUIRECTANGULAR', "Equirectangular", "Preview the cubemap image as an equirectangular"),
+        ]
+    )
+
+    def execute(self, context):
+        if self.direction == 'CUBEMAP':
+            image_path = context.scene.equirectangular_path
+        else:
+            image_path = context.scene.cubemap_path
+        if not os.path.isfile(image_path):
+            self.report({'ERROR'}, f"Image not found: {image_path}")
+            return {'CANCELLED'}
+        image = build_preview(image_path, self.direction)
+        if image is None:
+            self.report({'ERROR'}, f"Could not preview {image_path}")
+            return {'CANCELLED'}
+        context.scene.preview_image = image
+        return {'FINISHED'}
+
+class ConvertImageEquirectangularToCubemapOperator(bpy.types.Operator):
+    bl_idname = "addon.convert_image_equirectangular"
+    bl_label = "Convert Equirectangular Image to Cubemap"
+
+    def execute(self, context):
+        image = source_image(context.scene)
+        if image is None:
+            self.report({'ERROR'}, "No image selected and no World environment texture found")
+            return {'CANCELLED'}
+        try:
+            result = convert_image_equirectangular_to_cubemap(image, context.scene.pack_converted_images)
+        except Exception as e:
+            print(f"An error occurred during conversion: {e}")
+            import traceback
+            traceback.print_exc()
+            self.report({'ERROR'}, f"Failed to convert {image.name}, see the console for details")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Converted {image.name} to {result.name}")
+        return {'FINISHED'}
+
+class ConvertImageCubemapToEquirectangularOperator(bpy.types.Operator):
+    bl_idname = "addon.convert_image_cubemap"
+    bl_label = "Convert Cubemap Image to Equirectangular"
+
+    def execute(self, context):
+        image = source_image(context.scene)
+        if image is None:
+            self.report({'ERROR'}, "No image selected and no World environment texture found")
+            return {'CANCELLED'}
+        try:
+            result = convert_image_cubemap_to_equirectangular(image, context.scene.pack_converted_images)
+        except Exception as e:
+            print(f"An error occurred during conversion: {e}")
+            import traceback
+            traceback.print_exc()
+            self.report({'ERROR'}, f"Failed to convert {image.name}, see the console for details")
+            return {'CANCELLED'}
+
+        # Show the result in the World right away
+        if context.scene.assign_to_world:
+            node = world_environment_node(context.scene)
+            if node is not None:
+                node.image = result
+
+        self.report({'INFO'}, f"Converted {image.name} to {result.name}")
+        return {'FINISHED'}
+
+class SubmitSharedQueueOperator(bpy.types.Operator):
+    bl_idname = "addon.submit_shared_queue"
+    bl_label = "Submit Directories to Shared Queue"
+
+    def execute(self, context):
+        scene = context.scene
+        if not scene.shared_queue_directory:
+            self.report({'ERROR'}, "No shared queue directory set")
+            return {'CANCELLED'}
+        job_ids = submit_directory_jobs(scene.shared_queue_directory, scene.cubemaps_directory,
+                                        scene.equirectangulars_directory, scene.separate_alpha_channel)
+        self.report({'INFO'}, f"Submitted {len(job_ids)} jobs to {scene.shared_queue_directory}")
+        return {'FINISHED'}
+
+class WorkSharedQueueOperator(bpy.types.Operator):
+    bl_idname = "addon.work_shared_queue"
+    bl_label = "Work on Shared Queue"
+
+    def execute(self, context):
+        queue_dir = context.scene.shared_queue_directory
+        if not queue_dir:
+            self.report({'ERROR'}, "No shared queue directory set")
+            return {'CANCELLED'}
+        # Don't block the UI waiting for jobs that other machines are working on
+        finished = run_queue_worker(queue_dir, wait_for_leases=False)
+        self.report({'INFO'}, f"Finished {finished} jobs from {queue_dir}")
+        return {'FINISHED'}
+
 class ConverterPanel(bpy.types.Panel):
     bl_label = "Cubemap Tool"
     bl_idname = "MYADDON_PT_main"
@@ -516,28 +1012,94 @@ class ConverterPanel(bpy.types.Panel):
         layout = self.layout
 
         layout.prop(context.scene, "separate_alpha_channel")
+        layout.prop(context.scene, "write_hdr_stats")
         layout.separator()
 
+        # Low resolution preview of the last checked conversion
+        preview_image = context.scene.preview_image
+        if preview_image is not None and preview_image.preview is not None:
+            layout.label(text=preview_image.name)
+            layout.template_icon(icon_value=preview_image.preview.icon_id, scale=10.0)
+            layout.separator()
+
         # Cubemap to Equirectangular
         layout.label(text="Cubemap to Equirectangular")
         layout.prop(context.scene, "cubemap_path", text="Cubemap Image")
-        layout.operator("addon.convert_cubemap", text="Convert Cubemap")
+        row = layout.row(align=True)
+        row.operator("addon.convert_cubemap", text="Convert Cubemap")
+        row.operator("addon.preview_conversion", text="Preview").direction = 'EQUIRECTANGULAR'
         layout.prop(context.scene, "cubemaps_directory", text="Cubemaps Directory")
         layout.operator("addon.convert_all_cubemaps", text="Convert All Cubemaps")
         layout.separator()
 
+        # Cubemap rotation
+        layout.label(text="Rotate Cubemap")
+        row = layout.row(align=True)
+        row.prop(context.scene, "cubemap_yaw", text="Yaw")
+        row.prop(context.scene, "cubemap_pitch", text="Pitch")
+        row.prop(context.scene, "cubemap_roll", text="Roll")
+        layout.operator("addon.rotate_cubemap", text="Rotate Cubemap")
+        layout.separator()
+
         # Equirectangular to Cubemap
         layout.label(text="Equirectangular to Cubemap")
         layout.prop(context.scene, "equirectangular_path", text="Equirectangular Image")
-        layout.operator("addon.convert_equirectangular", text="Convert Equirectangular")
+        row = layout.row(align=True)
+        row.operator("addon.convert_equirectangular", text="Convert Equirectangular")
+        row.operator("addon.preview_conversion", text="Preview").direction = 'CUBEMAP'
+        layout.operator("addon.export_equirectangular_dds", text="Export DDS Cubemap")
         layout.prop(context.scene, "equirectangulars_directory", text="Equirectangulars Directory")
         layout.operator("addon.convert_all_equirectangulars", text="Convert All Equirectangulars")
+        layout.separator()
+
+        # Octahedral
+        layout.label(text="Octahedral")
+        layout.prop(context.scene, "octahedral_equal_area")
+        layout.operator("addon.convert_equirectangular_octahedral", text="Equirectangular to Octahedral")
+        layout.prop(context.scene, "octahedral_path", text="Octahedral Image")
+        layout.operator("addon.convert_octahedral", text="Octahedral to Equirectangular")
+        layout.separator()
+
+        # Multi-machine batch conversion
+        layout.label(text="Shared Queue")
+        layout.prop(context.scene, "shared_queue_directory", text="Queue Directory")
+        row = layout.row(align=True)
+        row.operator("addon.submit_shared_queue", text="Submit Directories")
+        row.operator("addon.work_shared_queue", text="Work on Queue")
+        layout.separator()
+
+        # Partial conversion
+        layout.label(text="Partial Conversion")
+        layout.prop(context.scene, "cubemap_faces")
+        layout.prop(context.scene, "use_equirect_roi")
+        if context.scene.use_equirect_roi:
+            layout.prop(context.scene, "equirect_roi_rows")
+            layout.prop(context.scene, "equirect_roi_columns")
+        layout.prop(context.scene, "update_in_place")
+        layout.separator()
+
+        # In-memory conversion of image datablocks
+        layout.label(text="Images in Memory")
+        layout.prop(context.scene, "source_image", text="Image (default: World)")
+        layout.prop(context.scene, "pack_converted_images")
+        layout.prop(context.scene, "assign_to_world")
+        layout.operator("addon.convert_image_equirectangular", text="Equirectangular to Cubemap")
+        layout.operator("addon.convert_image_cubemap", text="Cubemap to Equirectangular")
 
 def register():
     bpy.utils.register_class(ConvertCubemapToEquirectangularOperator)
     bpy.utils.register_class(ConvertAllCubemapsToEquirectangularOperator)
     bpy.utils.register_class(ConvertEquirectangularToCubemapOperator)
     bpy.utils.register_class(ConvertAllEquirectangularsToCubemapOperator)
+    bpy.utils.register_class(RotateCubemapOperator)
+    bpy.utils.register_class(ExportEquirectangularToDDSOperator)
+    bpy.utils.register_class(ConvertEquirectangularToOctahedralOperator)
+    bpy.utils.register_class(ConvertOctahedralToEquirectangularOperator)
+    bpy.utils.register_class(PreviewConversionOperator)
+    bpy.utils.register_class(SubmitSharedQueueOperator)
+    bpy.utils.register_class(WorkSharedQueueOperator)
+    bpy.utils.register_class(ConvertImageEquirectangularToCubemapOperator)
+    bpy.utils.register_class(ConvertImageCubemapToEquirectangularOperator)
     bpy.utils.register_class(ConverterPanel)
 
     bpy.types.Scene.cubemap_path = bpy.props.StringProperty(
@@ -565,12 +1127,119 @@ def register():
         description="Handle alpha channel separately",
         default=False
     )
+    bpy.types.Scene.write_hdr_stats = bpy.props.BoolProperty(
+        name="Write HDR Statistics",
+        description="Write luminance histogram, mean/peak luminance and sun direction as a JSON sidecar",
+        default=False
+    )
+    bpy.types.Scene.cubemap_yaw = bpy.props.FloatProperty(
+        name="Yaw",
+        description="Rotation of the cubemap around the up axis",
+        subtype="ANGLE",
+        default=0.0
+    )
+    bpy.types.Scene.cubemap_pitch = bpy.props.FloatProperty(
+        name="Pitch",
+        description="Rotation of the cubemap around the right axis",
+        subtype="ANGLE",
+        default=0.0
+    )
+    bpy.types.Scene.cubemap_roll = bpy.props.FloatProperty(
+        name="Roll",
+        description="Rotation of the cubemap around the forward axis",
+        subtype="ANGLE",
+        default=0.0
+    )
+    bpy.types.Scene.cubemap_faces = bpy.props.EnumProperty(
+        name="Faces",
+        description="Cubemap faces to compute when converting equirectangular to cubemap",
+        items=[
+            ('F', "Front", "Front face"),
+            ('R', "Right", "Right face"),
+            ('B', "Back", "Back face"),
+            ('L', "Left", "Left face"),
+            ('U', "Up", "Up face"),
+            ('D', "Down", "Down face"),
+        ],
+        options={'ENUM_FLAG'},
+        default={'F', 'R', 'B', 'L', 'U', 'D'}
+    )
+    bpy.types.Scene.use_equirect_roi = bpy.props.BoolProperty(
+        name="Equirectangular Region Only",
+        description="Only compute a region of the equirectangular output",
+        default=False
+    )
+    bpy.types.Scene.equirect_roi_rows = bpy.props.FloatVectorProperty(
+        name="Rows",
+        description="Top and bottom of the region, as fractions of the image height",
+        size=2,
+        min=0.0,
+        max=1.0,
+        default=(0.0, 1.0)
+    )
+    bpy.types.Scene.equirect_roi_columns = bpy.props.FloatVectorProperty(
+        name="Columns",
+        description="Left and right of the region, as fractions of the image width",
+        size=2,
+        min=0.0,
+        max=1.0,
+        default=(0.0, 1.0)
+    )
+    bpy.types.Scene.update_in_place = bpy.props.BoolProperty(
+        name="Update In Place",
+        description="Patch the converted faces or region into the existing output file",
+        default=False
+    )
+    bpy.types.Scene.shared_queue_directory = bpy.props.StringProperty(
+        name="Shared Queue Directory",
+        description="Directory on shared storage that coordinates batch conversion across machines",
+        subtype="DIR_PATH"
+    )
+    bpy.types.Scene.octahedral_path = bpy.props.StringProperty(
+        name="Octahedral Image",
+        description="Path to the octahedral image file",
+        subtype="FILE_PATH"
+    )
+    bpy.types.Scene.octahedral_equal_area = bpy.props.BoolProperty(
+        name="Equal-Area Octahedral",
+        description="Use the equal-area octahedral mapping, every texel covers the same solid angle",
+        default=False
+    )
+    bpy.types.Scene.preview_image = bpy.props.PointerProperty(
+        name="Preview Image",
+        description="Low resolution preview of a conversion",
+        type=bpy.types.Image
+    )
+    bpy.types.Scene.source_image = bpy.props.PointerProperty(
+        name="Source Image",
+        description="Image datablock to convert in memory; uses the World's environment texture when empty",
+        type=bpy.types.Image
+    )
+    bpy.types.Scene.pack_converted_images = bpy.props.BoolProperty(
+        name="Pack Converted Images",
+        description="Pack in-memory conversion results into the .blend file",
+        default=False
+    )
+    bpy.types.Scene.assign_to_world = bpy.props.BoolProperty(
+        name="Assign Result to World",
+        description="Use the equirectangular result as the World's environment texture",
+        default=False
+    )
 
 def unregister():
     bpy.utils.unregister_class(ConvertCubemapToEquirectangularOperator)
     bpy.utils.unregister_class(ConvertAllCubemapsToEquirectangularOperator)
     bpy.utils.unregister_class(ConvertEquirectangularToCubemapOperator)
     bpy.utils.unregister_class(ConvertAllEquirectangularsToCubemapOperator)
+    bpy.utils.unregister_class(RotateCubemapOperator)
+    bpy.utils.unregister_class(ExportEquirectangularToDDSOperator)
+    bpy.utils.unregister_class(ConvertEquirectangularToOctahedralOperator)
+    bpy.utils.unregister_class(ConvertOctahedralToEquirectangularOperator)
+    bpy.utils.unregister_class(PreviewConversionOperator)
+    bpy.utils.unregister_class(SubmitSharedQueueOperator)
+    bpy.utils.unregister_class(WorkSharedQueueOperator)
+    bpy.utils.unregister_class(ConvertImageEquirectangularToCubemapOperator)
+    bpy.utils.unregister_class(ConvertImageCubemapToEquirectangularOperator)
     bpy.utils.unregister_class(ConverterPanel)
 
     del bpy.types.Scene.cubemap_path
@@ -578,6 +1247,22 @@ def unregister():
     del bpy.types.Scene.equirectangular_path
     del bpy.types.Scene.equirectangulars_directory
     del bpy.types.Scene.separate_alpha_channel
+    del bpy.types.Scene.write_hdr_stats
+    del bpy.types.Scene.cubemap_yaw
+    del bpy.types.Scene.cubemap_pitch
+    del bpy.types.Scene.cubemap_roll
+    del bpy.types.Scene.cubemap_faces
+    del bpy.types.Scene.use_equirect_roi
+    del bpy.types.Scene.equirect_roi_rows
+    del bpy.types.Scene.equirect_roi_columns
+    del bpy.types.Scene.update_in_place
+    del bpy.types.Scene.shared_queue_directory
+    del bpy.types.Scene.octahedral_path
+    del bpy.types.Scene.octahedral_equal_area
+    del bpy.types.Scene.preview_image
+    del bpy.types.Scene.source_image
+    del bpy.types.Scene.pack_converted_images
+    del bpy.types.Scene.assign_to_world
 
 if __name__ == "__main__":
     register()
\ No newline at end of file
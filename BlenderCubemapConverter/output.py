@@ -0,0 +1,310 @@
+import os
+import queue
+import struct
+import threading
+import uuid
+import zlib
+
+import numpy as np
+
+from .radiance import write_hdr
+
+
+def write_png(path, pixels):
+    """Write a top-down [H, W, 3|4] float image in [0, 1] as an 8-bit PNG."""
+    h, w, c = pixels.shape
+    data = np.clip(np.round(pixels * 255.0), 0, 255).astype(np.uint8)
+
+    # Prefix every scanline with filter type 0 (None)
+    rows = np.zeros((h, w * c + 1), dtype=np.uint8)
+    rows[:, 1:] = data.reshape(h, w * c)
+
+    def chunk(tag, body):
+        return (struct.pack('>I', len(body)) + tag + body +
+                struct.pack('>I', zlib.crc32(tag + body) & 0xffffffff))
+
+    color_type = 6 if c == 4 else 2
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, color_type, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(rows.tobytes(), 6)))
+        f.write(chunk(b'IEND', b''))
+
+
+def _exr_attribute(name, type_name, value):
+    return name.encode() + b'\0' + type_name.encode() + b'\0' + struct.pack('<i', len(value)) + value
+
+
+def write_exr(path, pixels, half=True):
+    """Write a top-down [H, W, 3|4] float image as a ZIP-compressed scanline OpenEXR."""
+    h, w, c = pixels.shape
+    dtype = np.dtype('<f2') if half else np.dtype('<f4')
+    pixel_type = 1 if half else 2
+
+    # OpenEXR stores channels sorted by name
+    names = ['R', 'G', 'B', 'A'][:c]
+    order = sorted(range(c), key=lambda i: names[i])
+
+    chlist = b''.join(
+        names[i].encode() + b'\0' + struct.pack('<iB3xii', pixel_type, 0, 1, 1)
+        for i in order
+    ) + b'\0'
+    box = struct.pack('<iiii', 0, 0, w - 1, h - 1)
+    header = b''.join([
+        struct.pack('<ii', 20000630, 2),
+        _exr_attribute('channels', 'chlist', chlist),
+        _exr_attribute('compression', 'compression', b'\x03'),  # ZIP, 16 lines per block
+        _exr_attribute('dataWindow', 'box2i', box),
+        _exr_attribute('displayWindow', 'box2i', box),
+        _exr_attribute('lineOrder', 'lineOrder', b'\x00'),
+        _exr_attribute('pixelAspectRatio', 'float', struct.pack('<f', 1.0)),
+        _exr_attribute('screenWindowCenter', 'v2f', struct.pack('<ff', 0.0, 0.0)),
+        _exr_attribute('screenWindowWidth', 'float', struct.pack('<f', 1.0)),
+        b'\0',
+    ])
+
+    # Per scanline the channels are stored one after another
+    planar = np.ascontiguousarray(pixels[..., order].astype(dtype).transpose(0, 2, 1))
+
+    block_h = 16
+    chunks = []
+    for y in range(0, h, block_h):
+        raw = np.frombuffer(planar[y:y + block_h].tobytes(), np.uint8)
+
+        # ZIP predictor: interleave even/odd bytes, then delta encode
+        t = np.concatenate([raw[0::2], raw[1::2]])
+        d = np.empty_like(t)
+        d[:1] = t[:1]
+        d[1:] = (t[1:].astype(np.int16) - t[:-1] + 128).astype(np.uint8)
+        packed = zlib.compress(d.tobytes(), 6)
+        if len(packed) >= len(raw):
+            packed = raw.tobytes()
+        chunks.append(struct.pack('<ii', y, len(packed)) + packed)
+
+    offset = len(header) + 8 * len(chunks)
+    table = []
+    for data in chunks:
+        table.append(struct.pack('<Q', offset))
+        offset += len(data)
+
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(b''.join(table))
+        for data in chunks:
+            f.write(data)
+
+
+def _box_weights(n, m):
+    """Source indices and area weights [m, 4] of a box filter from n down to m texels."""
+    scale = n / m
+    start = np.arange(m) * scale
+    idx = np.floor(start).astype(np.int64)[:, None] + np.arange(4)
+    # Overlap of each source texel with the footprint of the output texel
+    overlap = np.minimum(idx + 1, (start + scale)[:, None]) - np.maximum(idx, start[:, None])
+    weights = (np.clip(overlap, 0, None) / scale).astype(np.float32)
+    return np.minimum(idx, n - 1), weights
+
+
+def cube_mip_chain(faces):
+    """
+    Box-filtered mip chain of a [6, W, W, C] face stack, down to 1x1.
+
+    Level sizes follow D3D, max(1, w // 2), which gives floor(log2(W)) + 1
+    levels. Every level area-averages the previous one for all six faces at
+    once; for even sizes that is the plain 2x2 mean, odd sizes spread each
+    output texel over a 2 + 1/m texel footprint.
+    """
+    levels = [faces]
+    while faces.shape[1] > 1:
+        n = faces.shape[1]
+        m = n // 2
+        idx, weights = _box_weights(n, m)
+        # Filter rows, then columns
+        rows = sum(weights[:, k, None, None] * faces[:, idx[:, k]] for k in range(4))
+        faces = sum(weights[:, k, None] * rows[:, :, idx[:, k]] for k in range(4)).astype(np.float32)
+        levels.append(faces)
+    return levels
+
+
+# DXGI formats of the DX10 header
+DDS_FORMATS = {
+    'float16': (10, np.dtype('<f2')),  # R16G16B16A16_FLOAT
+    'rgba8': (28, np.uint8),           # R8G8B8A8_UNORM
+    'rgba8_srgb': (29, np.uint8),      # R8G8B8A8_UNORM_SRGB
+}
+
+
+def write_dds_cubemap(path, cube_h, pixel_format='float16', encode=None):
+    """
+    Write a py360convert horizon cubemap [W, 6W, 3|4] of linear values as a
+    DX10 DDS cubemap with a full box-filtered mip chain.
+
+    Mips are filtered on the linear data; ``encode`` (e.g. linear to sRGB)
+    is applied to the RGB channels of every level afterwards.
+    """
+    dxgi_format, dtype = DDS_FORMATS[pixel_format]
+    w = cube_h.shape[0]
+    faces = np.stack(np.split(cube_h.astype(np.float32), 6, 1), 0)
+    if faces.shape[3] == 3:
+        faces = np.concatenate([faces, np.ones(faces.shape[:3] + (1,), np.float32)], 3)
+
+    # F R B L U D -> +X -X +Y -Y +Z -Z, flipped to the D3D face orientation
+    faces = np.stack([
+        faces[1, :, ::-1],
+        faces[3],
+        faces[4, ::-1],
+        faces[5],
+        faces[0],
+        faces[2, :, ::-1],
+    ], 0)
+
+    levels = cube_mip_chain(faces)
+    encoded = []
+    for level in levels:
+        if encode is not None:
+            level = level.copy()
+            level[..., :3] = encode(level[..., :3])
+        if dtype == np.uint8:
+            level = np.clip(np.round(level * 255.0), 0, 255)
+        else:
+            # Saturate instead of turning bright texels such as the sun into inf
+            level = np.clip(level, -np.finfo(np.float16).max, np.finfo(np.float16).max)
+        encoded.append(np.ascontiguousarray(level.astype(dtype)))
+
+    texel_size = 8 if pixel_format == 'float16' else 4
+    header = struct.pack(
+        '<4s7I44x8I5I',
+        b'DDS ', 124,
+        0x1 | 0x2 | 0x4 | 0x8 | 0x1000 | 0x20000,  # CAPS HEIGHT WIDTH PITCH PIXELFORMAT MIPMAPCOUNT
+        w, w, w * texel_size, 0, len(levels),
+        32, 0x4, struct.unpack('<I', b'DX10')[0], 0, 0, 0, 0, 0,  # FOURCC pixel format
+        0x1000 | 0x8 | 0x400000,  # TEXTURE COMPLEX MIPMAP
+        0x200 | 0xfc00,           # CUBEMAP and all six faces
+        0, 0, 0,
+    )
+    dx10 = struct.pack('<5I', dxgi_format, 3, 0x4, 1, 0)  # TEXTURE2D, TEXTURECUBE, one cube
+
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(dx10)
+        # Faces are stored one after another, each with its whole mip chain
+        for i in range(6):
+            for level in encoded:
+                f.write(level[i].tobytes())
+
+
+# Formats that can be encoded without Blender, and thus off the main thread
+NATIVE_WRITERS = {
+    'PNG': lambda path, pixels, half: write_png(path, pixels),
+    'OPEN_EXR': write_exr,
+    'HDR': lambda path, pixels, half: write_hdr(path, pixels),
+}
+
+
+class OutputQueue:
+    """
+    Bounded write-behind queue for finished conversion buffers.
+
+    Natively supported formats are encoded and written by worker threads, so
+    the caller can load and convert the next image in the meantime. Anything
+    else is handed to ``fallback`` on the calling thread, which is where
+    Blender's image API has to be used.
+
+    With ``staging``, every file is written under a temporary name next to
+    its final path and listed in ``staged`` as (temporary, final), so the
+    caller decides whether to move it into place or ``discard()`` it.
+    """
+
+    def __init__(self, fallback=None, workers=None, max_pending_bytes=1 << 30, staging=False):
+        self.fallback = fallback
+        self.staging = staging
+        self.staged = []
+        self.jobs = queue.Queue()
+        self.max_pending_bytes = max_pending_bytes
+        self.pending_bytes = 0
+        self.written = []
+        self.failed = []
+        self.lock = threading.Condition()
+        self.threads = []
+        for _ in range(workers or min(4, os.cpu_count() or 1)):
+            thread = threading.Thread(target=self._worker, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _worker(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                self.jobs.task_done()
+                return
+            path, pixels, output_format, half = job
+            try:
+                NATIVE_WRITERS[output_format](path, pixels, half)
+                print(f"Saved image to: {path}")
+                with self.lock:
+                    self.written.append(path)
+            except Exception as e:
+                print(f"Failed to write {path}: {e}")
+                with self.lock:
+                    self.failed.append(path)
+            finally:
+                with self.lock:
+                    self.pending_bytes -= pixels.nbytes
+                    self.lock.notify_all()
+                self.jobs.task_done()
+
+    def submit(self, path, pixels, output_format, half=True, **fallback_kwargs):
+        """
+        Queue a top-down [H, W, C] float buffer for writing.
+
+        Blocks while the buffers queued or being written would exceed
+        ``max_pending_bytes``, which bounds the memory held by finished but
+        unwritten images. A single larger buffer is still accepted once the
+        queue has drained.
+        """
+        if self.staging:
+            # No image extension, so directory scans never pick up leftovers
+            staged_path = f"{path}.{uuid.uuid4().hex[:8]}.staging"
+            with self.lock:
+                self.staged.append((staged_path, path))
+            path = staged_path
+        if output_format in NATIVE_WRITERS:
+            with self.lock:
+                while self.pending_bytes and self.pending_bytes + pixels.nbytes > self.max_pending_bytes:
+                    self.lock.wait()
+                self.pending_bytes += pixels.nbytes
+            self.jobs.put((path, pixels, output_format, half))
+            return
+        if self.fallback is None:
+            raise ValueError(f"No writer available for format {output_format}")
+        self.fallback(path, pixels, output_format, half=half, **fallback_kwargs)
+        with self.lock:
+            self.written.append(path)
+
+    def join(self):
+        """Wait until every queued buffer has been written."""
+        self.jobs.join()
+
+    def close(self):
+        """Flush the queue, stop the workers and return (written, failed) paths."""
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        return list(self.written), list(self.failed)
+
+    def discard(self):
+        """Delete the staged files."""
+        for staged_path, _ in self.staged:
+            try:
+                os.remove(staged_path)
+            except FileNotFoundError:
+                pass
+        self.staged = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
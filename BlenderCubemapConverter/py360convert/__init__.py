@@ -1,4 +1,7 @@
 from .e2c import e2c
 from .e2p import e2p
 from .c2e import c2e
+from .c2c import c2c
+from .octa import e2o, o2e, c2o, o2c
+from .stats import equirect_stats
 from .utils import *
@@ -0,0 +1,69 @@
+import numpy as np
+
+from . import utils
+
+
+def rotation_ypr(yaw_deg, pitch_deg, roll_deg):
+    '''
+    Rotation matrix (row-vector convention) for yaw about the up axis,
+    pitch about the right axis and roll about the forward axis, in degree.
+    '''
+    Rz = utils.rotation_matrix(roll_deg * np.pi / 180, [0, 0, 1])
+    Rx = utils.rotation_matrix(pitch_deg * np.pi / 180, [1, 0, 0])
+    Ry = utils.rotation_matrix(yaw_deg * np.pi / 180, [0, 1, 0])
+
+    return Rz.dot(Rx).dot(Ry)
+
+
+@utils.plan_cache(maxsize=4)
+def c2c_plan(face_w, yaw_deg, pitch_deg, roll_deg):
+    '''
+    Source face id and pixel coordinates for every texel of a rotated
+    horizon cubemap. Cached, since batches usually share one rotation.
+    '''
+    xyz = utils.xyzcube(face_w).dot(rotation_ypr(yaw_deg, pitch_deg, roll_deg))
+    tp, coor_x, coor_y = utils.xyz2cube(xyz)
+
+    # xyzcube places texel centers from -0.5 to 0.5 inclusive, so invert that
+    # exactly. Edge texels lie on two faces at once and xyz2cube hands them to
+    # U/D, so c2c short-circuits the identity rotation instead of relying on it.
+    coor_x = (np.clip(coor_x, -0.5, 0.5) + 0.5) * (face_w - 1)
+    coor_y = (np.clip(coor_y, -0.5, 0.5) + 0.5) * (face_w - 1)
+
+    for arr in (tp, coor_x, coor_y):
+        arr.flags.writeable = False
+    return tp, coor_y, coor_x
+
+
+def c2c(cubemap, yaw_deg=0, pitch_deg=0, roll_deg=0, mode='bilinear', cube_format='dice'):
+    '''
+    Rotate a cubemap without going through an equirectangular intermediate.
+    cubemap:   ndarray or list/dict of faces in the given cube_format
+    yaw_deg:   rotation about the up axis
+    pitch_deg: rotation about the right axis
+    roll_deg:  rotation about the forward axis
+    The result uses the same cube_format as the input.
+    '''
+    if mode == 'bilinear':
+        order = 1
+    elif mode == 'nearest':
+        order = 0
+    else:
+        raise NotImplementedError('unknown mode')
+
+    cubemap = utils.cube_any2h(cubemap, cube_format)
+    face_w = cubemap.shape[0]
+
+    if yaw_deg % 360 == 0 and pitch_deg % 360 == 0 and roll_deg % 360 == 0:
+        # No rotation, return an unresampled copy
+        cube_h = cubemap.copy()
+    else:
+        cube_faces = np.stack(np.split(cubemap, 6, 1), 0)
+        tp, coor_y, coor_x = c2c_plan(face_w, float(yaw_deg), float(pitch_deg), float(roll_deg))
+
+        cube_h = np.stack([
+            utils.sample_cubefaces(cube_faces[..., i], tp, coor_y, coor_x, order=order)
+            for i in range(cube_faces.shape[3])
+        ], axis=-1).astype(cubemap.dtype)
+
+    return utils.cube_h2any(cube_h, cube_format)
@@ -3,7 +3,13 @@ import numpy as np
 from . import utils
 
 
-def c2e(cubemap, h, w, mode='bilinear', cube_format='dice'):
+def c2e(cubemap, h, w, mode='bilinear', cube_format='dice', roi=None):
+    '''
+    cubemap: ndarray or list/dict of faces in the given cube_format
+    h, w:    size of the full equirectangular image
+    roi:     optional (top, bottom, left, right) pixel bounds, only that
+             region of the equirectangular image is computed and returned
+    '''
     if mode == 'bilinear':
         order = 1
     elif mode == 'nearest':
@@ -23,16 +29,20 @@ def c2e(cubemap, h, w, mode='bilinear', cube_format='dice'):
         raise NotImplementedError('unknown cube_format')
     face_w = cubemap.shape[0]
 
-    uv = utils.equirect_uvgrid(h, w)
-    u, v = np.split(uv, 2, axis=-1)
-    u = u[..., 0]
-    v = v[..., 0]
+    top, bottom, left, right = roi if roi is not None else (0, h, 0, w)
+    if not (0 <= top < bottom <= h and 0 <= left < right <= w):
+        raise ValueError('roi out of bounds')
+
+    # Same grid as equirect_uvgrid, restricted to the roi
+    u = np.linspace(-np.pi, np.pi, num=w, dtype=utils.get_precision())[left:right]
+    v = np.linspace(np.pi, -np.pi, num=h, dtype=utils.get_precision())[top:bottom] / 2
+    u, v = np.meshgrid(u, v)
     cube_faces = np.stack(np.split(cubemap, 6, 1), 0)
 
     # Get face id to each pixel: 0F 1R 2B 3L 4U 5D
-    tp = utils.equirect_facetype(h, w)
-    coor_x = np.zeros((h, w))
-    coor_y = np.zeros((h, w))
+    tp = utils.equirect_facetype(h, w, (top, bottom, left, right))
+    coor_x = np.zeros(tp.shape, utils.get_precision())
+    coor_y = np.zeros(tp.shape, utils.get_precision())
 
     for i in range(4):
         mask = (tp == i)
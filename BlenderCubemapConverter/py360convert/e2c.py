@@ -3,10 +3,74 @@ import numpy as np
 from . import utils
 
 
-def e2c(e_img, face_w=256, mode='bilinear', cube_format='dice'):
+@utils.plan_cache(maxsize=2)
+def e2c_plan(face_w, h, w, face_ids=(0, 1, 2, 3, 4, 5)):
+    '''
+    Equirect pixel coordinates for every texel of the faces in face_ids,
+    side by side in that order. For all faces this is the horizon cubemap
+    uv2coor(xyz2uv(xyzcube(face_w)), h, w), computed exploiting the cube
+    symmetry:
+    - the four side faces share one latitude table and their longitudes
+      are 1D per-column tables offset by multiples of pi/2
+    - the front face latitude is odd in rows and even in columns, so only
+      one quadrant is evaluated
+    - the down face mirrors the up face
+    Only the tables the requested faces need are evaluated.
+    '''
+    dtype = utils.get_precision()
+    rng = np.linspace(-0.5, 0.5, num=face_w, dtype=dtype)
+    a = rng[None, :]   # horizontal face coordinate, per column
+    b = -rng[:, None]  # vertical face coordinate, per row
+    half = dtype(0.5)
+
+    def to_x(u):
+        return (u / (2 * np.pi) + 0.5) * w - 0.5
+
+    def to_y(v):
+        return (-v / np.pi + 0.5) * h - 0.5
+
+    if any(i < 4 for i in face_ids):
+        # Side faces: 1D longitude and radius, one quadrant of latitude
+        u_f = np.arctan2(a, half)
+        r = np.sqrt(a**2 + half**2)
+        q = (face_w + 1) // 2
+        v_f = np.empty((face_w, face_w), dtype)
+        v_f[:q, :q] = np.arctan(b[:q] / r[:, :q])
+        v_f[:q, face_w - q:] = v_f[:q, :q][:, ::-1]
+        v_f[face_w - q:] = -v_f[:q][::-1]
+        side_y = to_y(v_f)
+        side_u = [
+            u_f,                                   # F
+            np.pi / 2 - u_f,                       # R
+            np.where(a >= 0, np.pi, -np.pi) - u_f, # B
+            u_f - np.pi / 2,                       # L
+        ]
+
+    if 4 in face_ids or 5 in face_ids:
+        # Up face: u = atan2(x, z), v = atan2(0.5, |xz|); down face has v negated
+        up_x = to_x(np.arctan2(a, b))
+        v_up = np.arctan2(half, np.sqrt(a**2 + b**2))
+
+    out = np.empty((face_w, face_w * len(face_ids), 2), dtype)
+    for j, i in enumerate(face_ids):
+        cols = slice(j*face_w, (j+1)*face_w)
+        if i < 4:
+            out[:, cols, 0] = to_x(side_u[i])
+            out[:, cols, 1] = side_y
+        else:
+            out[:, cols, 0] = up_x
+            out[:, cols, 1] = to_y(v_up if i == 4 else -v_up)
+
+    out.flags.writeable = False
+    return out
+
+
+def e2c(e_img, face_w=256, mode='bilinear', cube_format='dice', faces=None):
     '''
     e_img:  ndarray in shape of [H, W, *]
     face_w: int, the length of each face of the cubemap
+    faces:  optional subset of F R B L U D to compute, the other faces are
+            left zero ('dict' format only contains the requested faces)
     '''
     h, w = e_img.shape[:2]
     if mode == 'bilinear':
@@ -16,21 +80,33 @@ def e2c(e_img, face_w=256, mode='bilinear', cube_format='dice'):
     else:
         raise NotImplementedError('unknown mode')
 
-    xyz = utils.xyzcube(face_w)
-    uv = utils.xyz2uv(xyz)
-    coor_xy = utils.uv2coor(uv, h, w)
+    face_ids = utils.cube_face_ids(faces)
+    if not face_ids:
+        raise ValueError('no faces requested')
 
-    cubemap = np.stack([
+    # Plan and sample only the requested faces, in one pass
+    coor_xy = e2c_plan(face_w, h, w, tuple(face_ids))
+
+    sampled = np.stack([
         utils.sample_equirec(e_img[..., i], coor_xy, order=order)
         for i in range(e_img.shape[2])
     ], axis=-1)
 
+    if len(face_ids) < 6:
+        cubemap = np.zeros((face_w, face_w * 6, sampled.shape[2]), sampled.dtype)
+        for j, i in enumerate(face_ids):
+            cubemap[:, i*face_w:(i+1)*face_w] = sampled[:, j*face_w:(j+1)*face_w]
+    else:
+        cubemap = sampled
+
     if cube_format == 'horizon':
         pass
     elif cube_format == 'list':
         cubemap = utils.cube_h2list(cubemap)
     elif cube_format == 'dict':
         cubemap = utils.cube_h2dict(cubemap)
+        if faces is not None:
+            cubemap = {k: v for k, v in cubemap.items() if k in faces}
     elif cube_format == 'dice':
         cubemap = utils.cube_h2dice(cubemap)
     else:
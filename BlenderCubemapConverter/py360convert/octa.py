@@ -0,0 +1,127 @@
+import numpy as np
+
+from . import utils
+
+
+# A size x size octahedral map matches the angular resolution of a cubemap
+# with face_w = size / 2 using 1/3 fewer texels (size**2 vs 6 * face_w**2).
+
+
+def _order(mode):
+    if mode == 'bilinear':
+        return 1
+    elif mode == 'nearest':
+        return 0
+    raise NotImplementedError('unknown mode')
+
+
+def _readonly(*arrs):
+    for arr in arrs:
+        arr.flags.writeable = False
+    return arrs if len(arrs) > 1 else arrs[0]
+
+
+@utils.plan_cache(maxsize=2)
+def e2o_plan(size, h, w, equal_area):
+    '''
+    Equirect pixel coordinates of every octahedral texel.
+    '''
+    xyz = utils.octa2xyz(utils.octa_grid(size), equal_area)
+    return _readonly(utils.uv2coor(utils.xyz2uv(xyz), h, w))
+
+
+@utils.plan_cache(maxsize=2)
+def o2e_plan(size, h, w, equal_area):
+    '''
+    Octahedral pixel coordinates (y, x) of every equirect pixel.
+    '''
+    xyz = utils.uv2unitxyz(utils.equirect_uvgrid(h, w))
+    st = utils.xyz2octa(xyz, equal_area)
+    coor = (st + 1) / 2 * size - 0.5
+    return _readonly(coor[..., 1].copy(), coor[..., 0].copy())
+
+
+@utils.plan_cache(maxsize=2)
+def c2o_plan(size, face_w, equal_area):
+    '''
+    Cube face id and pixel coordinates (y, x) of every octahedral texel.
+    '''
+    xyz = utils.octa2xyz(utils.octa_grid(size), equal_area)
+    tp, coor_x, coor_y = utils.xyz2cube(xyz)
+    # Same texel placement as c2c_plan
+    coor_x = (np.clip(coor_x, -0.5, 0.5) + 0.5) * (face_w - 1)
+    coor_y = (np.clip(coor_y, -0.5, 0.5) + 0.5) * (face_w - 1)
+    return _readonly(tp, coor_y, coor_x)
+
+
+@utils.plan_cache(maxsize=2)
+def o2c_plan(size, face_w, equal_area):
+    '''
+    Octahedral pixel coordinates (y, x) of every horizon cubemap texel.
+    '''
+    st = utils.xyz2octa(utils.xyzcube(face_w), equal_area)
+    coor = (st + 1) / 2 * size - 0.5
+    return _readonly(coor[..., 1].copy(), coor[..., 0].copy())
+
+
+def e2o(e_img, size=512, mode='bilinear', equal_area=False):
+    '''
+    e_img:      ndarray in shape of [H, W, *]
+    size:       int, the side length of the square octahedral map
+    equal_area: use the equal-area octahedral mapping
+    '''
+    h, w = e_img.shape[:2]
+    order = _order(mode)
+    coor_xy = e2o_plan(size, h, w, bool(equal_area))
+
+    return np.stack([
+        utils.sample_equirec(e_img[..., i], coor_xy, order=order)
+        for i in range(e_img.shape[2])
+    ], axis=-1)
+
+
+def o2e(o_img, h, w, mode='bilinear', equal_area=False):
+    '''
+    o_img: ndarray in shape of [S, S, *], an octahedral map
+    h, w:  size of the equirectangular output
+    '''
+    order = _order(mode)
+    coor_y, coor_x = o2e_plan(o_img.shape[0], h, w, bool(equal_area))
+
+    return np.stack([
+        utils.sample_octa(o_img[..., i], coor_y, coor_x, order=order)
+        for i in range(o_img.shape[2])
+    ], axis=-1)
+
+
+def c2o(cubemap, size=512, mode='bilinear', cube_format='dice', equal_area=False):
+    '''
+    cubemap: ndarray or list/dict of faces in the given cube_format
+    size:    int, the side length of the square octahedral map
+    '''
+    order = _order(mode)
+    cubemap = utils.cube_any2h(cubemap, cube_format)
+    face_w = cubemap.shape[0]
+    cube_faces = np.stack(np.split(cubemap, 6, 1), 0)
+    tp, coor_y, coor_x = c2o_plan(size, face_w, bool(equal_area))
+
+    return np.stack([
+        utils.sample_cubefaces(cube_faces[..., i], tp, coor_y, coor_x, order=order)
+        for i in range(cube_faces.shape[3])
+    ], axis=-1)
+
+
+def o2c(o_img, face_w=256, mode='bilinear', cube_format='dice', equal_area=False):
+    '''
+    o_img:  ndarray in shape of [S, S, *], an octahedral map
+    face_w: int, the length of each face of the cubemap
+    '''
+    order = _order(mode)
+    coor_y, coor_x = o2c_plan(o_img.shape[0], face_w, bool(equal_area))
+
+    cube_h = np.stack([
+        utils.sample_octa(o_img[..., i], coor_y, coor_x, order=order)
+        for i in range(o_img.shape[2])
+    ], axis=-1)
+
+    return utils.cube_h2any(cube_h, cube_format)
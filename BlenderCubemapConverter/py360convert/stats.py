@@ -0,0 +1,69 @@
+import numpy as np
+
+from . import utils
+
+
+def equirect_stats(e_img, ev_range=(-16, 16), bins=64, sun_fraction=1e-3):
+    '''
+    Solid-angle weighted luminance statistics of a linear equirectangular image.
+    e_img:        ndarray in shape of [H, W, 3+], top-down rows
+    ev_range:     log2 luminance range of the histogram, values outside are
+                  counted in the first/last bin
+    bins:         number of histogram bins
+    sun_fraction: fraction of the brightest pixels whose luminance-weighted
+                  mean direction estimates the sun
+    Directions are unit xyz vectors (x right, y up, z forward) and the
+    matching longitude/latitude in degree.
+    '''
+    h, w = e_img.shape[:2]
+    lum = (0.2126 * e_img[..., 0] + 0.7152 * e_img[..., 1] + 0.0722 * e_img[..., 2]).astype(np.float32)
+    row_sr = utils.equirect_solid_angle(h, w)
+    sr = np.broadcast_to(row_sr[:, None], (h, w))
+
+    total_sr = float(row_sr.sum() * w)
+    mean = float((lum * row_sr[:, None]).sum(dtype=np.float64) / total_sr)
+
+    peak_idx = np.unravel_index(np.argmax(lum), lum.shape)
+    peak = float(lum[peak_idx])
+
+    # Histogram over exposure values, as fractions of the sphere
+    ev = np.log2(np.maximum(lum, 2.0 ** (ev_range[0] - 1)))
+    hist, _ = np.histogram(np.clip(ev, *ev_range), bins=bins, range=ev_range, weights=sr)
+    hist = hist / total_sr
+
+    # Brightest pixels, weighted by luminance and solid angle
+    flat = lum.ravel()
+    k = max(1, int(round(flat.size * sun_fraction)))
+    top = np.argpartition(flat, flat.size - k)[flat.size - k:]
+    rows, cols = np.unravel_index(top, lum.shape)
+    coor = np.stack([cols, rows], -1).astype(utils.get_precision())
+    xyz = utils.uv2unitxyz(utils.coor2uv(coor, h, w))
+    weight = (flat[top] * row_sr[rows])[:, None]
+    sun = (xyz * weight).sum(0)
+    sun = sun / max(np.linalg.norm(sun), 1e-12)
+
+    def direction(xyz):
+        xyz = np.asarray(xyz, np.float64)
+        uv = utils.xyz2uv(xyz[None].astype(utils.get_precision()))[0]
+        return {
+            'xyz': [float(c) for c in xyz],
+            'longitude_deg': float(np.degrees(uv[0])),
+            'latitude_deg': float(np.degrees(uv[1])),
+        }
+
+    peak_xyz = utils.uv2unitxyz(utils.coor2uv(
+        np.array([peak_idx[1], peak_idx[0]], utils.get_precision()), h, w))
+
+    return {
+        'mean_luminance': mean,
+        'peak_luminance': peak,
+        'peak_direction': direction(peak_xyz),
+        'sun_direction': direction(sun),
+        'sun_solid_angle_sr': float(row_sr[rows].sum()),
+        'sun_luminance': float(weight.sum() / max(row_sr[rows].sum(), 1e-12)),
+        'histogram': {
+            'ev_min': ev_range[0],
+            'ev_max': ev_range[1],
+            'fractions': [float(v) for v in hist],
+        },
+    }
@@ -1,16 +1,71 @@
+from functools import lru_cache, wraps
+
 import numpy as np
 import scipy
 import scipy.ndimage
 
 
+# Float type of every geometry and coordinate array. The coordinate grids are
+# the largest arrays in the pipeline, so float32 halves their memory and
+# bandwidth; coordinates stay within ~1e-3 px even on 16K equirects.
+_precision = np.float32
+
+
+def set_precision(dtype):
+    '''
+    dtype: np.float32 (default) or np.float64
+    '''
+    global _precision
+    dtype = np.dtype(dtype).type
+    if dtype not in (np.float32, np.float64):
+        raise NotImplementedError('unknown precision')
+    _precision = dtype
+
+
+def get_precision():
+    return _precision
+
+
+# Remap plan caches, registered so clear_plan_cache() can empty them all
+_plan_caches = []
+
+
+def plan_cache(maxsize):
+    '''
+    lru_cache for remap plans. Plans are built with the active precision,
+    so it is part of the cache key. Plans of a 16K image take hundreds of
+    MB each, so callers should release them with clear_plan_cache() when done.
+    '''
+    def decorator(fn):
+        @lru_cache(maxsize=maxsize)
+        def cached(precision, *args, **kwargs):
+            return fn(*args, **kwargs)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            return cached(_precision, *args, **kwargs)
+
+        wrapper.cache_clear = cached.cache_clear
+        wrapper.cache_info = cached.cache_info
+        _plan_caches.append(cached)
+        return wrapper
+    return decorator
+
+
+def clear_plan_cache():
+    '''
+    Release every cached remap plan.
+    '''
+    for cached in _plan_caches:
+        cached.cache_clear()
 
 
 def xyzcube(face_w):
     '''
     Return the xyz cordinates of the unit cube in [F R B L U D] format.
     '''
-    out = np.zeros((face_w, face_w * 6, 3), np.float32)
-    rng = np.linspace(-0.5, 0.5, num=face_w, dtype=np.float32)
+    out = np.zeros((face_w, face_w * 6, 3), _precision)
+    rng = np.linspace(-0.5, 0.5, num=face_w, dtype=_precision)
     grid = np.stack(np.meshgrid(rng, -rng), -1)
 
     # Front face (z = 0.5)
@@ -41,39 +96,56 @@ def xyzcube(face_w):
 
 
 def equirect_uvgrid(h, w):
-    u = np.linspace(-np.pi, np.pi, num=w, dtype=np.float32)
-    v = np.linspace(np.pi, -np.pi, num=h, dtype=np.float32) / 2
+    u = np.linspace(-np.pi, np.pi, num=w, dtype=_precision)
+    v = np.linspace(np.pi, -np.pi, num=h, dtype=_precision) / 2
 
     return np.stack(np.meshgrid(u, v), axis=-1)
 
 
-def equirect_facetype(h, w):
+def equirect_solid_angle(h, w):
+    '''
+    Return the exact solid angle of one pixel in each row of an h x w
+    equirectangular image, shape [h]. The whole image sums to 4 pi.
+    '''
+    edges = np.linspace(np.pi / 2, -np.pi / 2, num=h + 1)
+    return ((np.sin(edges[:-1]) - np.sin(edges[1:])) * (2 * np.pi / w)).astype(_precision)
+
+
+def equirect_facetype(h, w, roi=None):
     '''
     0F 1R 2B 3L 4U 5D
+    roi: optional (top, bottom, left, right) pixel bounds, only that region
+         is computed and returned
+    Face ids are returned as int8, which holds them exactly.
     '''
-    tp = np.roll(np.arange(4).repeat(w // 4)[None, :].repeat(h, 0), 3 * w // 8, 1)
+    top, bottom, left, right = roi if roi is not None else (0, h, 0, w)
+    quarter = w // 4
+
+    # Side face and position within its quarter of every requested column;
+    # the quarters start 3w/8 to the right of the left border
+    k = (np.arange(left, right) - 3 * w // 8) % (4 * quarter)
+    side = (k // quarter).astype(np.int8)
 
-    # Prepare ceil mask
-    mask = np.zeros((h, w // 4), bool)
-    idx = np.linspace(-np.pi, np.pi, w // 4) / 4
-    idx = h // 2 - np.round(np.arctan(np.cos(idx)) * h / np.pi).astype(int)
-    for i, j in enumerate(idx):
-        mask[:j, i] = 1
-    mask = np.roll(np.concatenate([mask] * 4, 1), 3 * w // 8, 1)
+    # Ceil height of each column
+    idx = np.linspace(-np.pi, np.pi, quarter, dtype=_precision) / 4
+    ceil = h // 2 - np.round(np.arctan(np.cos(idx)) * h / np.pi).astype(int)
+    ceil = ceil[k % quarter]
 
-    tp[mask] = 4
-    tp[np.flip(mask, 0)] = 5
+    rows = np.arange(top, bottom)[:, None]
+    tp = np.repeat(side[None, :], bottom - top, 0)
+    tp[rows < ceil] = 4
+    tp[rows >= h - ceil] = 5
 
-    return tp.astype(np.int32)
+    return tp
 
 
 def xyzpers(h_fov, v_fov, u, v, out_hw, in_rot):
-    out = np.ones((*out_hw, 3), np.float32)
+    out = np.ones((*out_hw, 3), _precision)
 
     x_max = np.tan(h_fov / 2)
     y_max = np.tan(v_fov / 2)
-    x_rng = np.linspace(-x_max, x_max, num=out_hw[1], dtype=np.float32)
-    y_rng = np.linspace(-y_max, y_max, num=out_hw[0], dtype=np.float32)
+    x_rng = np.linspace(-x_max, x_max, num=out_hw[1], dtype=_precision)
+    y_rng = np.linspace(-y_max, y_max, num=out_hw[0], dtype=_precision)
     out[..., :2] = np.stack(np.meshgrid(x_rng, -y_rng), -1)
     Rx = rotation_matrix(v, [1, 0, 0])
     Ry = rotation_matrix(u, [0, 1, 0])
@@ -86,7 +158,7 @@ def xyz2uv(xyz):
     '''
     xyz: ndarray in shape of [..., 3]
     '''
-    x, y, z = np.split(xyz, 3, axis=-1)
+    x, y, z = np.split(xyz.astype(_precision, copy=False), 3, axis=-1)
     u = np.arctan2(x, z)
     c = np.sqrt(x**2 + z**2)
     v = np.arctan2(y, c)
@@ -94,8 +166,36 @@ def xyz2uv(xyz):
     return np.concatenate([u, v], axis=-1)
 
 
+def xyz2cube(xyz):
+    '''
+    xyz: ndarray in shape of [..., 3], need not be normalized
+    Return the face id (0F 1R 2B 3L 4U 5D) hit by each direction and its
+    coordinates on that face in range [-0.5, 0.5], matching the layout
+    expected by sample_cubefaces.
+    '''
+    x, y, z = xyz[..., 0], xyz[..., 1], xyz[..., 2]
+    ax, ay, az = np.abs(x), np.abs(y), np.abs(z)
+
+    tp = np.where(
+        (ay >= ax) & (ay >= az),
+        np.where(y > 0, 4, 5),
+        np.where(az >= ax, np.where(z > 0, 0, 2), np.where(x > 0, 1, 3))
+    ).astype(np.int8)
+
+    coor_x = np.zeros(tp.shape, _precision)
+    coor_y = np.zeros(tp.shape, _precision)
+    # (face id, horizontal, vertical, depth)
+    for i, cx, cy, d in [(0, x, -y, z), (1, -z, -y, x), (2, x, y, z),
+                         (3, -z, y, x), (4, x, z, y), (5, -x, z, y)]:
+        mask = (tp == i)
+        coor_x[mask] = 0.5 * cx[mask] / d[mask]
+        coor_y[mask] = 0.5 * cy[mask] / d[mask]
+
+    return tp, coor_x, coor_y
+
+
 def uv2unitxyz(uv):
-    u, v = np.split(uv, 2, axis=-1)
+    u, v = np.split(uv.astype(_precision, copy=False), 2, axis=-1)
     y = np.sin(v)
     c = np.cos(v)
     x = c * np.sin(u)
@@ -110,7 +210,7 @@ def uv2coor(uv, h, w):
     h: int, height of the equirectangular image
     w: int, width of the equirectangular image
     '''
-    u, v = np.split(uv, 2, axis=-1)
+    u, v = np.split(uv.astype(_precision, copy=False), 2, axis=-1)
     coor_x = (u / (2 * np.pi) + 0.5) * w - 0.5
     coor_y = (-v / np.pi + 0.5) * h - 0.5
 
@@ -118,7 +218,7 @@ def uv2coor(uv, h, w):
 
 
 def coor2uv(coorxy, h, w):
-    coor_x, coor_y = np.split(coorxy, 2, axis=-1)
+    coor_x, coor_y = np.split(coorxy.astype(_precision, copy=False), 2, axis=-1)
     u = ((coor_x + 0.5) / w - 0.5) * 2 * np.pi
     v = -((coor_y + 0.5) / h - 0.5) * np.pi
 
@@ -142,7 +242,7 @@ def sample_cubefaces(cube_faces, tp, coor_y, coor_x, order):
     cube_faces[4] = np.flip(cube_faces[4], 0)
 
     # Pad up down
-    pad_ud = np.zeros((6, 2, cube_faces.shape[2]))
+    pad_ud = np.zeros((6, 2, cube_faces.shape[2]), cube_faces.dtype)
     pad_ud[0, 0] = cube_faces[5, 0, :]
     pad_ud[0, 1] = cube_faces[4, -1, :]
     pad_ud[1, 0] = cube_faces[5, :, -1]
@@ -158,7 +258,7 @@ def sample_cubefaces(cube_faces, tp, coor_y, coor_x, order):
     cube_faces = np.concatenate([cube_faces, pad_ud], 1)
 
     # Pad left right
-    pad_lr = np.zeros((6, cube_faces.shape[1], 2))
+    pad_lr = np.zeros((6, cube_faces.shape[1], 2), cube_faces.dtype)
     pad_lr[0, :, 0] = cube_faces[1, :, 0]
     pad_lr[0, :, 1] = cube_faces[3, :, -1]
     pad_lr[1, :, 0] = cube_faces[2, :, 0]
@@ -173,7 +273,140 @@ def sample_cubefaces(cube_faces, tp, coor_y, coor_x, order):
     pad_lr[5, 1:-1, 1] = cube_faces[3, -2, ::-1]
     cube_faces = np.concatenate([cube_faces, pad_lr], 2)
 
-    return scipy.ndimage.map_coordinates(cube_faces, [tp, coor_y, coor_x], order=order, mode='wrap')
+    # Stack as floats explicitly, a mixed int/float list would become float64
+    coor = np.stack([tp.astype(coor_x.dtype), coor_y, coor_x])
+    return scipy.ndimage.map_coordinates(cube_faces, coor, order=order, mode='wrap')
+
+
+def octa_grid(size):
+    '''
+    Return the texel centers of a size x size octahedral map as [..., 2]
+    (s, t) coordinates in range [-1, 1], s along columns and t along rows.
+    '''
+    rng = (np.arange(size, dtype=_precision) + 0.5) / size * 2 - 1
+
+    return np.stack(np.meshgrid(rng, rng), -1)
+
+
+def xyz2octa(xyz, equal_area=False):
+    '''
+    xyz: ndarray in shape of [..., 3], need not be normalized
+    Return the octahedral (s, t) coordinates in range [-1, 1] with the up
+    (y) pole at the center and the down pole at the corners.
+    equal_area selects Clarberg's equal-area octahedral mapping.
+    '''
+    xyz = xyz.astype(_precision, copy=False)
+    x, y, z = xyz[..., 0], xyz[..., 1], xyz[..., 2]
+
+    if equal_area:
+        n = np.sqrt(x**2 + y**2 + z**2)
+        r = np.sqrt(np.maximum(1 - np.abs(y) / n, 0))
+        t = np.arctan2(np.abs(z), np.abs(x)) * (2 / np.pi) * r
+        s = r - t
+    else:
+        n = np.abs(x) + np.abs(y) + np.abs(z)
+        s = np.abs(x) / n
+        t = np.abs(z) / n
+
+    # Fold the lower hemisphere over the outer triangles
+    lower = y < 0
+    s, t = np.where(lower, 1 - t, s), np.where(lower, 1 - s, t)
+
+    return np.stack([np.copysign(s, x), np.copysign(t, z)], -1)
+
+
+def octa2xyz(st, equal_area=False):
+    '''
+    st: ndarray in shape of [..., 2], octahedral coordinates in range [-1, 1]
+    Return the unit direction of each coordinate, inverse of xyz2octa.
+    '''
+    st = st.astype(_precision, copy=False)
+    s, t = st[..., 0], st[..., 1]
+    a_s, a_t = np.abs(s), np.abs(t)
+    d = 1 - a_s - a_t
+
+    # Unfold the outer triangles onto the lower hemisphere
+    lower = d < 0
+    a_s, a_t = np.where(lower, 1 - np.abs(t), a_s), np.where(lower, 1 - np.abs(s), a_t)
+
+    if equal_area:
+        r = a_s + a_t
+        phi = np.where(r > 0, a_t / np.where(r > 0, r, 1), 0) * (np.pi / 2)
+        y = np.sign(d) * (1 - r**2)
+        c = r * np.sqrt(np.maximum(2 - r**2, 0))
+        x = c * np.cos(phi)
+        z = c * np.sin(phi)
+    else:
+        x, y, z = a_s, d, a_t
+        n = np.sqrt(x**2 + y**2 + z**2)
+        x, y, z = x / n, y / n, z / n
+
+    return np.stack([np.copysign(x, s), y, np.copysign(z, t)], -1)
+
+
+def sample_octa(o_img, coor_y, coor_x, order):
+    '''
+    Sample a square octahedral map, padding each border with its folded
+    neighbor so that filtering is seamless across the edges.
+    '''
+    pad = np.zeros((o_img.shape[0] + 2, o_img.shape[1] + 2), o_img.dtype)
+    pad[1:-1, 1:-1] = o_img
+    pad[0, 1:-1] = o_img[0, ::-1]
+    pad[-1, 1:-1] = o_img[-1, ::-1]
+    pad[1:-1, 0] = o_img[::-1, 0]
+    pad[1:-1, -1] = o_img[::-1, -1]
+    pad[0, 0] = o_img[-1, -1]
+    pad[0, -1] = o_img[-1, 0]
+    pad[-1, 0] = o_img[0, -1]
+    pad[-1, -1] = o_img[0, 0]
+
+    coor = np.stack([coor_y + 1, coor_x + 1])
+    return scipy.ndimage.map_coordinates(pad, coor, order=order, mode='nearest')
+
+
+def cube_face_ids(faces=None):
+    '''
+    faces: None for all faces, or an iterable of keys in F R B L U D
+    Return the sorted face ids of the selection.
+    '''
+    face_k = ['F', 'R', 'B', 'L', 'U', 'D']
+    if faces is None:
+        return list(range(6))
+    for k in faces:
+        if k not in face_k:
+            raise NotImplementedError(f'unknown face {k}')
+    return [i for i, k in enumerate(face_k) if k in faces]
+
+
+def cube_any2h(cubemap, cube_format):
+    '''
+    cubemap: ndarray or list/dict of faces in the given cube_format
+    Return the cubemap in horizon format.
+    '''
+    if cube_format == 'horizon':
+        return cubemap
+    elif cube_format == 'list':
+        return cube_list2h(cubemap)
+    elif cube_format == 'dict':
+        return cube_dict2h(cubemap)
+    elif cube_format == 'dice':
+        return cube_dice2h(cubemap)
+    raise NotImplementedError('unknown cube_format')
+
+
+def cube_h2any(cube_h, cube_format):
+    '''
+    Return a horizon cubemap in the given cube_format.
+    '''
+    if cube_format == 'horizon':
+        return cube_h
+    elif cube_format == 'list':
+        return cube_h2list(cube_h)
+    elif cube_format == 'dict':
+        return cube_h2dict(cube_h)
+    elif cube_format == 'dice':
+        return cube_h2dice(cube_h)
+    raise NotImplementedError('unknown cube_format')
 
 
 def cube_h2list(cube_h):
@@ -236,4 +469,4 @@ def rotation_matrix(rad, ax):
                       [ax[2], 0, -ax[0]],
                       [-ax[1], ax[0], 0]])
 
-    return R
+    return R.astype(_precision)
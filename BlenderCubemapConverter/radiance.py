@@ -0,0 +1,248 @@
+import numpy as np
+
+# Radiance scanlines are run-length encoded per channel only within this width range
+RLE_MIN_WIDTH = 8
+RLE_MAX_WIDTH = 0x7fff
+
+# Shortest repeat worth encoding as a run instead of literal bytes
+MIN_RUN = 4
+
+
+def read_hdr_header(f):
+    """
+    Parse a Radiance header up to and including the resolution string.
+
+    Returns (width, height, flip_y, flip_x), where the flags tell whether file
+    rows or columns run against the usual top-down, left-to-right order.
+    """
+    if not f.readline(64).startswith((b'#?RADIANCE', b'#?RGBE')):
+        raise ValueError("not a Radiance HDR file")
+    # Header lines end at a blank line, followed by the resolution string
+    while True:
+        line = f.readline(1024)
+        if not line:
+            raise ValueError("truncated header")
+        line = line.strip()
+        if not line:
+            break
+        if line.startswith(b'FORMAT=') and line != b'FORMAT=32-bit_rle_rgbe':
+            raise ValueError(f"unsupported pixel format {line[7:].decode(errors='replace')}")
+
+    tokens = f.readline(64).split()
+    if len(tokens) != 4 or tokens[0][1:] != b'Y' or tokens[2][1:] != b'X':
+        raise ValueError("unsupported image orientation")
+    height, width = int(tokens[1]), int(tokens[3])
+    return width, height, tokens[0][:1] == b'+', tokens[2][:1] == b'-'
+
+
+def rgbe_to_float(rgbe):
+    """Decode [..., 4] uint8 RGBE texels to float32 RGB, centering each mantissa step like Blender."""
+    exponent = rgbe[..., 3:].astype(np.int32)
+    scale = np.where(exponent > 0, np.ldexp(np.float32(1), exponent - 136), 0).astype(np.float32)
+    return (rgbe[..., :3] + np.float32(0.5)) * scale
+
+
+def float_to_rgbe(rgb):
+    """Encode [..., 3] float RGB as uint8 RGBE texels sharing the exponent of the largest channel."""
+    rgb = np.maximum(rgb[..., :3], 0).astype(np.float32)
+    peak = rgb.max(axis=-1, keepdims=True)
+    mantissa, exponent = np.frexp(peak)
+    valid = (peak > 1e-32) & (exponent < 128)
+    scale = np.divide(mantissa * 256, peak, out=np.zeros_like(peak), where=valid)
+
+    rgbe = np.empty(rgb.shape[:-1] + (4,), dtype=np.uint8)
+    rgbe[..., :3] = np.minimum(rgb * scale, 255)
+    rgbe[..., 3:] = np.where(valid, exponent + 128, 0)
+    # Values beyond the RGBE range saturate instead of wrapping
+    overflow = (exponent >= 128)[..., 0]
+    rgbe[overflow] = 255
+    return rgbe
+
+
+def _expand_tokens(buf, headers):
+    """Gather the bytes of run-length tokens starting at ``headers`` in ``buf``."""
+    raw = np.frombuffer(buf, dtype=np.uint8)
+    headers = np.asarray(headers, dtype=np.int64)
+    counts = raw[headers].astype(np.int64)
+    is_run = counts > 128
+    lengths = np.where(is_run, counts - 128, counts)
+
+    # Runs repeat the byte after the header, literals copy the bytes after it
+    ends = np.cumsum(lengths)
+    offsets = np.arange(ends[-1]) - np.repeat(ends - lengths, lengths)
+    src = np.repeat(headers + 1, lengths) + np.where(np.repeat(is_run, lengths), 0, offsets)
+    return raw[src]
+
+
+def _decode_rle_rows(buf, pos, rows, width):
+    """Decode ``rows`` run-length encoded scanlines from ``buf`` at ``pos``. Returns (rgbe, new pos)."""
+    need = 4 * width
+    headers = []
+    add = headers.append
+    for _ in range(rows):
+        if buf[pos] != 2 or buf[pos + 1] != 2 or (buf[pos + 2] << 8 | buf[pos + 3]) != width:
+            raise ValueError("corrupt run-length encoded scanline")
+        pos += 4
+        # Only the token headers are walked here; their bytes are expanded in one go
+        n = 0
+        while n < need:
+            count = buf[pos]
+            add(pos)
+            if count > 128:
+                n += count - 128
+                pos += 2
+            elif count:
+                n += count
+                pos += count + 1
+            else:
+                raise ValueError("zero length run in scanline")
+        if n != need:
+            raise ValueError("run overflows scanline")
+
+    # Each scanline stores all red bytes, then green, blue and exponent
+    channels = _expand_tokens(buf, headers).reshape(rows, 4, width)
+    return channels.transpose(0, 2, 1), pos
+
+
+def iter_hdr_scanlines(path, rows_per_chunk=64):
+    """
+    Stream a Radiance .hdr file as (first_row, float32 [rows, W, 3]) chunks.
+
+    Only one chunk of scanlines is decoded at a time. Rows are numbered
+    top-down; files stored bottom-up yield their chunks bottom row first.
+    """
+    with open(path, 'rb') as f:
+        width, height, flip_y, flip_x = read_hdr_header(f)
+        # Worst case encoding is a 2 byte run for every byte of the scanline
+        max_row_bytes = 8 * width + 4
+        buf = b''
+        pos = 0
+        y = 0
+        while y < height:
+            rows = min(rows_per_chunk, height - y)
+            buf = buf[pos:]
+            pos = 0
+            missing = rows * max_row_bytes - len(buf)
+            if missing > 0:
+                buf += f.read(missing)
+
+            try:
+                rle = RLE_MIN_WIDTH <= width <= RLE_MAX_WIDTH and buf[0] == 2 and buf[1] == 2 and buf[2] < 128
+                if rle:
+                    rgbe, pos = _decode_rle_rows(buf, 0, rows, width)
+                else:
+                    # Flat files store 4 byte RGBE texels without compression
+                    pos = rows * width * 4
+                    if len(buf) < pos:
+                        raise ValueError("truncated pixel data")
+                    rgbe = np.frombuffer(buf, dtype=np.uint8, count=pos).reshape(rows, width, 4)
+                    if ((rgbe[..., 0] == 1) & (rgbe[..., 1] == 1) & (rgbe[..., 2] == 1)).any():
+                        raise ValueError("old-style run-length encoding is not supported")
+            except IndexError:
+                raise ValueError("truncated pixel data")
+
+            rgb = rgbe_to_float(rgbe)
+            if flip_x:
+                rgb = rgb[:, ::-1]
+            if flip_y:
+                yield height - y - rows, np.ascontiguousarray(rgb[::-1])
+            else:
+                yield y, rgb
+            y += rows
+
+
+def read_hdr(path, max_width=None):
+    """
+    Read a Radiance .hdr file as a top-down float32 [H, W, 3] array.
+
+    With max_width, wider images are decimated by a whole-pixel stride while
+    streaming, so the full resolution image is never held in memory.
+    """
+    with open(path, 'rb') as f:
+        width, height, _, _ = read_hdr_header(f)
+    stride = -(-width // max_width) if max_width is not None and width > max_width else 1
+    out = np.empty((-(-height // stride), -(-width // stride), 3), dtype=np.float32)
+    for y, rgb in iter_hdr_scanlines(path):
+        # Keep the rows of this chunk that fall on the stride grid
+        kept = rgb[-y % stride::stride, ::stride]
+        start = -(-y // stride)
+        out[start:start + len(kept)] = kept
+    return out
+
+
+def _encode_rle_rows(rgbe):
+    """Run-length encode [rows, W, 4] RGBE texels into Radiance scanlines."""
+    rows, width, _ = rgbe.shape
+    # One sequence per scanline channel, in file order
+    data = np.ascontiguousarray(rgbe.transpose(0, 2, 1)).reshape(rows * 4, width)
+    flat = data.ravel()
+
+    # Runs of equal bytes, never crossing a channel boundary
+    change = np.ones(flat.shape, dtype=bool)
+    change[1:] = flat[1:] != flat[:-1]
+    change[::width] = True
+    starts = np.flatnonzero(change)
+    lengths = np.diff(np.append(starts, flat.size))
+    seq = starts // width
+
+    # Short runs are merged with their neighbours into literal segments
+    long_run = lengths >= MIN_RUN
+    seg_start = ~long_run
+    seg_start[1:] &= long_run[:-1] | (seq[1:] != seq[:-1])
+    seg_id = np.cumsum(seg_start) - 1
+    short = ~long_run
+    lit_starts = starts[seg_start]
+    lit_lengths = np.bincount(seg_id[short], weights=lengths[short], minlength=len(lit_starts)).astype(np.int64)
+
+    item_starts = np.concatenate([starts[long_run], lit_starts])
+    item_lengths = np.concatenate([lengths[long_run], lit_lengths])
+    item_run = np.concatenate([np.ones(long_run.sum(), dtype=bool), np.zeros(len(lit_starts), dtype=bool)])
+    order = np.argsort(item_starts, kind='stable')
+    item_starts, item_lengths, item_run = item_starts[order], item_lengths[order], item_run[order]
+
+    # Split items into tokens of at most 127 repeated or 128 literal bytes
+    limit = np.where(item_run, 127, 128)
+    n_tokens = -(-item_lengths // limit)
+    token_item = np.repeat(np.arange(len(item_starts)), n_tokens)
+    token_index = np.arange(len(token_item)) - np.repeat(np.cumsum(n_tokens) - n_tokens, n_tokens)
+    token_offset = token_index * limit[token_item]
+    token_src = item_starts[token_item] + token_offset
+    token_len = np.minimum(limit[token_item], item_lengths[token_item] - token_offset)
+    token_run = item_run[token_item]
+
+    # Every scanline is prefixed with a 4 byte marker holding the width
+    token_size = 1 + np.where(token_run, 1, token_len)
+    token_line = token_src // (4 * width)
+    out_pos = np.cumsum(token_size) - token_size + 4 * (token_line + 1)
+    out = np.empty(int(token_size.sum()) + 4 * rows, dtype=np.uint8)
+
+    line_pos = np.searchsorted(token_line, np.arange(rows))
+    line_out = out_pos[line_pos] - 4
+    out[line_out] = 2
+    out[line_out + 1] = 2
+    out[line_out + 2] = width >> 8
+    out[line_out + 3] = width & 0xff
+
+    out[out_pos] = np.where(token_run, 128 + token_len, token_len)
+    run_pos = out_pos[token_run]
+    out[run_pos + 1] = flat[token_src[token_run]]
+
+    lit_len = token_len[~token_run]
+    lit_offsets = np.arange(lit_len.sum()) - np.repeat(np.cumsum(lit_len) - lit_len, lit_len)
+    out[np.repeat(out_pos[~token_run] + 1, lit_len) + lit_offsets] = flat[np.repeat(token_src[~token_run], lit_len) + lit_offsets]
+    return out
+
+
+def write_hdr(path, pixels, rows_per_chunk=256):
+    """Write a top-down [H, W, 3|4] float image as a run-length encoded Radiance .hdr, dropping alpha."""
+    h, w = pixels.shape[:2]
+    with open(path, 'wb') as f:
+        f.write(b'#?RADIANCE\nFORMAT=32-bit_rle_rgbe\n\n')
+        f.write(f"-Y {h} +X {w}\n".encode())
+        # Encode in chunks of scanlines to bound the temporary buffers
+        for y in range(0, h, rows_per_chunk):
+            rgbe = float_to_rgbe(pixels[y:y + rows_per_chunk, :, :3])
+            if RLE_MIN_WIDTH <= w <= RLE_MAX_WIDTH:
+                f.write(_encode_rle_rows(rgbe).tobytes())
+            else:
+                f.write(rgbe.tobytes())
@@ -0,0 +1,176 @@
+import os
+import struct
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .radiance import read_hdr_header
+
+# Every extension the converters know how to load
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tiff', '.tif', '.bmp', '.exr', '.hdr')
+
+ImageInfo = namedtuple('ImageInfo', ['path', 'width', 'height', 'channels', 'layout'])
+
+
+def _png_header(f):
+    data = f.read(26)
+    if data[:8] != b'\x89PNG\r\n\x1a\n' or data[12:16] != b'IHDR':
+        return None
+    width, height, _, color_type = struct.unpack('>IIBB', data[16:26])
+    channels = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}.get(color_type, 3)
+    return width, height, channels
+
+
+def _jpeg_header(f):
+    if f.read(2) != b'\xff\xd8':
+        return None
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xff:
+            return None
+        # Skip fill bytes
+        while marker[1] == 0xff:
+            marker = marker[1:] + f.read(1)
+        length = struct.unpack('>H', f.read(2))[0]
+        # Start-of-frame markers carry the image size, except DHT/JPG/DAC
+        if 0xc0 <= marker[1] <= 0xcf and marker[1] not in (0xc4, 0xc8, 0xcc):
+            _, height, width, channels = struct.unpack('>BHHB', f.read(6))
+            return width, height, channels
+        f.seek(length - 2, 1)
+
+
+def _exr_header(f):
+    if struct.unpack('<i', f.read(4))[0] != 20000630:
+        return None
+    f.read(4)
+    data = f.read(65536)
+    width = height = channels = None
+    pos = 0
+    while pos < len(data) and data[pos] != 0:
+        name_end = data.index(b'\0', pos)
+        type_end = data.index(b'\0', name_end + 1)
+        name = data[pos:name_end]
+        size = struct.unpack('<i', data[type_end + 1:type_end + 5])[0]
+        value = data[type_end + 5:type_end + 5 + size]
+        if name == b'dataWindow':
+            x_min, y_min, x_max, y_max = struct.unpack('<iiii', value)
+            width, height = x_max - x_min + 1, y_max - y_min + 1
+        elif name == b'channels':
+            # Each entry is a null-terminated name followed by 16 bytes
+            channels, i = 0, 0
+            while value[i] != 0:
+                i = value.index(b'\0', i) + 17
+                channels += 1
+        pos = type_end + 5 + size
+    if width is None:
+        return None
+    return width, height, channels or 3
+
+
+def _hdr_header(f):
+    # Same parser as the loader, so files it can't decode aren't listed as convertible
+    width, height, _, _ = read_hdr_header(f)
+    return width, height, 3
+
+
+def _bmp_header(f):
+    data = f.read(30)
+    if data[:2] != b'BM':
+        return None
+    width, height, _, bpp = struct.unpack('<iiHH', data[18:30])
+    return width, abs(height), 4 if bpp == 32 else 3
+
+
+def _tiff_header(f):
+    order = f.read(2)
+    if order not in (b'II', b'MM'):
+        return None
+    e = '<' if order == b'II' else '>'
+    f.read(2)
+    f.seek(struct.unpack(e + 'I', f.read(4))[0])
+    tags = {}
+    for _ in range(struct.unpack(e + 'H', f.read(2))[0]):
+        tag, typ, _, value = struct.unpack(e + 'HHI4s', f.read(12))
+        # SHORT values are left-justified in the 4 byte field
+        tags[tag] = struct.unpack(e + 'H', value[:2])[0] if typ == 3 else struct.unpack(e + 'I', value)[0]
+    if 256 not in tags or 257 not in tags:
+        return None
+    return tags[256], tags[257], tags.get(277, 1)
+
+
+HEADER_READERS = {
+    '.png': _png_header,
+    '.jpg': _jpeg_header,
+    '.jpeg': _jpeg_header,
+    '.exr': _exr_header,
+    '.hdr': _hdr_header,
+    '.bmp': _bmp_header,
+    '.tiff': _tiff_header,
+    '.tif': _tiff_header,
+}
+
+
+def read_image_header(path):
+    """Return (width, height, channels) from the file header only, or None if unreadable."""
+    reader = HEADER_READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return reader(f)
+    except (OSError, ValueError, IndexError, struct.error) as e:
+        print(f"Failed to read header of {path}: {e}")
+        return None
+
+
+def classify_layout(width, height):
+    """Classify an image as 'equirect' (2:1), 'dice' (4:3), 'strip' (6:1 or 1:6) or 'other'."""
+    if width == 2 * height:
+        return 'equirect'
+    if 3 * width == 4 * height:
+        return 'dice'
+    if width == 6 * height or height == 6 * width:
+        return 'strip'
+    return 'other'
+
+
+def iter_image_files(directory):
+    """Recursively yield paths of files with a supported image extension."""
+    stack = [directory]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    # Like os.walk, don't follow directory symlinks, which may form cycles
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield entry.path
+        except OSError as e:
+            print(f"Failed to scan directory: {e}")
+
+
+def _image_info(path):
+    header = read_image_header(path)
+    if header is None:
+        return None
+    width, height, channels = header
+    return ImageInfo(path, width, height, channels, classify_layout(width, height))
+
+
+def scan_images(directory, layout=None, workers=16):
+    """
+    Find images under ``directory`` by reading only their headers.
+
+    If ``layout`` is given, files of any other layout are skipped, so they
+    are never fully decoded. Results are sorted by path.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        infos = [info for info in pool.map(_image_info, iter_image_files(directory)) if info is not None]
+
+    if layout is not None:
+        for info in infos:
+            if info.layout != layout:
+                print(f"Skipping {info.path}: {info.width}x{info.height} is not a {layout} layout")
+        infos = [info for info in infos if info.layout == layout]
+
+    return sorted(infos, key=lambda info: info.path)
@@ -0,0 +1,265 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+
+
+def _write_atomic(path, data):
+    """Write JSON through a temporary file and rename, so readers never see partial files."""
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class LeaseLost(RuntimeError):
+    pass
+
+
+class Lease:
+    """
+    A worker's claim on one job, handed to the job handler.
+
+    ``lost`` is set as soon as a heartbeat finds the claim taken over, so a
+    long handler can stop early. Handlers write their outputs to temporary
+    files and move them into place with commit(), which only happens while
+    the lease is still held.
+    """
+
+    def __init__(self, queue, job_id, token):
+        self.queue = queue
+        self.job_id = job_id
+        self.token = token
+        self.lost = threading.Event()
+
+    def held(self):
+        return not self.lost.is_set() and self.queue.owns(self.job_id, self.token)
+
+    def commit(self, staged):
+        """Move (temporary, final) files into place, or delete them and raise LeaseLost if the lease is gone."""
+        if not self.held():
+            for staged_path, _ in staged:
+                try:
+                    os.remove(staged_path)
+                except FileNotFoundError:
+                    pass
+            raise LeaseLost(f"Lost lease on job {self.job_id}")
+        # Heartbeats keep renewing the lease meanwhile, so it cannot expire
+        # between the check above and the renames
+        for staged_path, path in staged:
+            os.replace(staged_path, path)
+        return [path for _, path in staged]
+
+
+class WorkQueue:
+    """
+    Job queue coordinated purely through a shared directory.
+
+    Layout under ``root``:
+        jobs/<id>.json      job description, written once by submit()
+        claims/<id>.lock    lease of the worker processing the job; created
+                            with O_EXCL, renewed by touching its mtime
+        done/<id>.json      final status of the job
+        results/<worker>.jsonl  per-worker results log
+
+    A lease whose mtime is older than ``lease_seconds`` belongs to a crashed
+    worker and is broken by the next worker looking for work.
+
+    Lease ages are measured against the mtime of a probe file touched the
+    same way as a heartbeat, not against the local clock. File servers that
+    set times themselves (NFS does for plain utime calls) thus need no clock
+    agreement; otherwise worker clocks must agree to well within
+    ``lease_seconds``.
+    """
+
+    def __init__(self, root, lease_seconds=120):
+        self.root = root
+        self.lease_seconds = lease_seconds
+        for sub in ('jobs', 'claims', 'done', 'results'):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+        self.clock_path = os.path.join(root, f".clock-{socket.gethostname()}")
+
+    def _path(self, sub, job_id, ext):
+        return os.path.join(self.root, sub, f"{job_id}{ext}")
+
+    def submit(self, jobs):
+        """Add job dicts to the queue; resubmitting an identical job is a no-op. Returns the job ids."""
+        job_ids = []
+        for job in jobs:
+            job_id = hashlib.sha1(json.dumps(job, sort_keys=True).encode()).hexdigest()[:16]
+            job_path = self._path('jobs', job_id, '.json')
+            if not os.path.exists(job_path):
+                _write_atomic(job_path, job)
+            job_ids.append(job_id)
+        return job_ids
+
+    def pending(self):
+        """Ids of jobs without a final status."""
+        done = {name[:-5] for name in os.listdir(os.path.join(self.root, 'done'))}
+        return sorted(name[:-5] for name in os.listdir(os.path.join(self.root, 'jobs'))
+                      if name.endswith('.json') and name[:-5] not in done)
+
+    def _now(self):
+        """Current time as the file server stamps it, see the class docstring."""
+        with open(self.clock_path, 'a'):
+            pass
+        os.utime(self.clock_path)
+        return os.stat(self.clock_path).st_mtime
+
+    def _lease_expired(self, lock_path):
+        try:
+            return self._now() - os.stat(lock_path).st_mtime > self.lease_seconds
+        except FileNotFoundError:
+            return False
+
+    def _break_stale_lock(self, lock_path):
+        # Rename is atomic, so only one worker takes the stale lock away
+        stale_path = f"{lock_path}.{uuid.uuid4().hex}.stale"
+        try:
+            os.rename(lock_path, stale_path)
+        except FileNotFoundError:
+            return
+        # The owner may have renewed it between our check and rename. If a
+        # third worker claimed the job meanwhile, the lock can't be restored;
+        # the owner then finds its lease lost at the next heartbeat and never
+        # commits its outputs or result, so the job still runs only once.
+        if self._now() - os.stat(stale_path).st_mtime <= self.lease_seconds:
+            try:
+                os.link(stale_path, lock_path)
+            except FileExistsError:
+                pass
+        os.remove(stale_path)
+
+    def claim(self, worker_id):
+        """Claim the next pending job. Returns (job_id, job, token) or None if nothing is claimable."""
+        for job_id in self.pending():
+            lock_path = self._path('claims', job_id, '.lock')
+            if os.path.exists(lock_path):
+                if not self._lease_expired(lock_path):
+                    continue
+                print(f"Breaking expired lease on job {job_id}")
+                self._break_stale_lock(lock_path)
+
+            token = uuid.uuid4().hex
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'worker': worker_id, 'token': token, 'claimed': time.time()}, f)
+
+            # The job may have finished while we were looking at it
+            if os.path.exists(self._path('done', job_id, '.json')):
+                self.release(job_id, token)
+                continue
+
+            job = _read_json(self._path('jobs', job_id, '.json'))
+            if job is None:
+                self.release(job_id, token)
+                continue
+            return job_id, job, token
+        return None
+
+    def owns(self, job_id, token):
+        lock = _read_json(self._path('claims', job_id, '.lock'))
+        return lock is not None and lock.get('token') == token
+
+    def heartbeat(self, job_id, token):
+        """Renew the lease. Returns False if the lease was lost to another worker."""
+        if not self.owns(job_id, token):
+            return False
+        try:
+            os.utime(self._path('claims', job_id, '.lock'))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def release(self, job_id, token):
+        if self.owns(job_id, token):
+            try:
+                os.remove(self._path('claims', job_id, '.lock'))
+            except FileNotFoundError:
+                pass
+
+    def finish(self, job_id, token, worker_id, status, result=None):
+        """Record the final status of a claimed job, unless its lease was lost meanwhile."""
+        if not self.owns(job_id, token):
+            print(f"Lost lease on job {job_id}, discarding its result")
+            return False
+        record = {'job': job_id, 'worker': worker_id, 'status': status,
+                  'result': result, 'finished': time.time()}
+        _write_atomic(self._path('done', job_id, '.json'), record)
+        with open(self._path('results', worker_id, '.jsonl'), 'a') as f:
+            f.write(json.dumps(record) + '\n')
+        self.release(job_id, token)
+        return True
+
+    def results(self):
+        """Final status records of all jobs, merged from the per-worker logs."""
+        records = []
+        results_dir = os.path.join(self.root, 'results')
+        for name in sorted(os.listdir(results_dir)):
+            with open(os.path.join(results_dir, name)) as f:
+                records.extend(json.loads(line) for line in f if line.strip())
+        return records
+
+    def run_worker(self, handler, worker_id=None, poll_seconds=5.0, wait_for_leases=True):
+        """
+        Process jobs with ``handler(job, lease) -> result`` until none are left.
+        Handlers should put their outputs in place with lease.commit().
+
+        With wait_for_leases, the worker keeps polling while other workers
+        hold leases, so it can pick up jobs of workers that crash.
+        Returns the number of jobs this worker finished.
+        """
+        worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        finished = 0
+        while True:
+            claimed = self.claim(worker_id)
+            if claimed is None:
+                if not self.pending() or not wait_for_leases:
+                    return finished
+                time.sleep(poll_seconds)
+                continue
+
+            job_id, job, token = claimed
+            print(f"Worker {worker_id} processing job {job_id}")
+            lease = Lease(self, job_id, token)
+
+            # Keep the lease alive while the handler runs
+            stop = threading.Event()
+
+            def beat():
+                while not stop.wait(self.lease_seconds / 4):
+                    if not self.heartbeat(job_id, token):
+                        print(f"Lost lease on job {job_id}")
+                        lease.lost.set()
+                        return
+
+            beater = threading.Thread(target=beat, daemon=True)
+            beater.start()
+            try:
+                result = handler(job, lease)
+                status = 'done'
+            except Exception as e:
+                traceback.print_exc()
+                result = str(e)
+                status = 'failed'
+            finally:
+                stop.set()
+                beater.join()
+
+            if self.finish(job_id, token, worker_id, status, result):
+                finished += 1
@@ -0,0 +1,12 @@
+import os
+import sys
+import types
+
+ADDON_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'BlenderCubemapConverter')
+
+# The addon's __init__ needs Blender; register the package without running it
+# so its standalone modules (output, radiance, workqueue, ...) can be imported
+if 'BlenderCubemapConverter' not in sys.modules:
+    package = types.ModuleType('BlenderCubemapConverter')
+    package.__path__ = [os.path.abspath(ADDON_DIR)]
+    sys.modules['BlenderCubemapConverter'] = package
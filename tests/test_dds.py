@@ -0,0 +1,36 @@
+import numpy as np
+
+from BlenderCubemapConverter.output import cube_mip_chain, write_dds_cubemap
+
+# DDS header plus DX10 extension
+HEADER_BYTES = 4 + 124 + 20
+
+
+def test_mip_chain_halves_even_faces():
+    faces = np.random.default_rng(0).random((6, 16, 16, 4), dtype=np.float32)
+    levels = cube_mip_chain(faces)
+    assert [level.shape[1] for level in levels] == [16, 8, 4, 2, 1]
+    assert np.allclose(levels[1], faces.reshape(6, 8, 2, 8, 2, 4).mean(axis=(2, 4)))
+
+
+def test_mip_chain_rounds_odd_sizes_down():
+    faces = np.random.default_rng(0).random((6, 1500, 1500, 4), dtype=np.float32)
+    levels = cube_mip_chain(faces)
+    sizes = [level.shape[1] for level in levels]
+    assert sizes == [1500, 750, 375, 187, 93, 46, 23, 11, 5, 2, 1]
+    assert len(levels) == int(np.log2(1500)) + 1
+    # Area averaging keeps the mean of every face
+    for level in levels:
+        assert np.allclose(level.mean(axis=(1, 2), dtype=np.float64), faces.mean(axis=(1, 2), dtype=np.float64), atol=1e-5)
+
+
+def test_dds_size_and_mip_count_for_odd_faces(tmp_path):
+    w = 45
+    cube_h = np.random.default_rng(0).random((w, 6 * w, 3), dtype=np.float32)
+    path = tmp_path / 'cube.dds'
+    write_dds_cubemap(str(path), cube_h, 'float16')
+
+    sizes = [45, 22, 11, 5, 2, 1]
+    data = path.read_bytes()
+    assert int.from_bytes(data[28:32], 'little') == len(sizes)
+    assert len(data) == HEADER_BYTES + 6 * sum(8 * n * n for n in sizes)
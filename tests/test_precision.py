@@ -0,0 +1,75 @@
+import os
+import sys
+
+import numpy as np
+
+# py360convert is vendored inside the addon, import it without Blender
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'BlenderCubemapConverter'))
+
+from py360convert import utils  # noqa: E402
+from py360convert.e2c import e2c_plan  # noqa: E402
+
+# 16K equirect and the face width its cubemap uses
+H, W = 8192, 16384
+FACE_W = 4096
+
+# Largest allowed float32 vs float64 deviation of a sample coordinate, in pixels
+MAX_ERROR_PX = 2e-3
+
+
+def coordinate_error(a, b, w):
+    '''Max per-axis difference, with x taken across the longitude seam.'''
+    a = a.astype(np.float64)
+    dx = np.abs(a[..., 0] - b[..., 0])
+    dx = np.minimum(dx, w - dx)
+    dy = np.abs(a[..., 1] - b[..., 1])
+    return max(dx.max(), dy.max())
+
+
+def strided_cube_xyz(dtype, stride=7):
+    '''Every stride-th row and column of xyzcube(FACE_W), without building the full grid.'''
+    rng = np.linspace(-0.5, 0.5, num=FACE_W, dtype=dtype)[::stride]
+    a, b = np.meshgrid(rng, -rng)
+    half = np.full_like(a, 0.5)
+    faces = [
+        (a, b, half), (half, b, a), (a, b, -half),
+        (-half, b, a), (a, half, b), (a, -half, b),
+    ]
+    return np.concatenate([np.stack(f, -1) for f in faces], 1)
+
+
+def with_precision(dtype, fn):
+    previous = utils.get_precision()
+    utils.set_precision(dtype)
+    try:
+        return fn()
+    finally:
+        utils.set_precision(previous)
+
+
+def test_uv2coor_float32_error_at_16k():
+    def coords():
+        xyz = strided_cube_xyz(utils.get_precision())
+        return utils.uv2coor(utils.xyz2uv(xyz), H, W)
+
+    coor32 = with_precision(np.float32, coords)
+    coor64 = with_precision(np.float64, coords)
+    assert coor32.dtype == np.float32
+    assert coordinate_error(coor32, coor64, W) < MAX_ERROR_PX
+
+
+def test_e2c_plan_float32_error_at_16k():
+    # A smaller face keeps the test cheap; the error is governed by the
+    # 16K coordinate range, not by the number of texels
+    face_w = 1024
+    plan32 = with_precision(np.float32, lambda: e2c_plan(face_w, H, W))
+    plan64 = with_precision(np.float64, lambda: e2c_plan(face_w, H, W))
+    assert plan32.dtype == np.float32
+    assert coordinate_error(plan32, plan64, W) < MAX_ERROR_PX
+
+
+def test_plan_cache_is_keyed_on_precision():
+    plan32 = with_precision(np.float32, lambda: e2c_plan(16, 64, 128))
+    plan64 = with_precision(np.float64, lambda: e2c_plan(16, 64, 128))
+    assert plan32.dtype == np.float32
+    assert plan64.dtype == np.float64
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from BlenderCubemapConverter.radiance import (
+    RLE_MAX_WIDTH, _encode_rle_rows, float_to_rgbe, read_hdr, read_hdr_header, rgbe_to_float, write_hdr,
+)
+
+HEADER = b'#?RADIANCE\nFORMAT=32-bit_rle_rgbe\n\n'
+
+
+def random_hdr(h, w, seed=0):
+    '''Positive values over many exponents, like a sky with a sun.'''
+    rng = np.random.default_rng(seed)
+    return (rng.random((h, w, 3)) * np.exp2(rng.integers(-20, 20, (h, w, 1)))).astype(np.float32)
+
+
+def quantized(pixels):
+    '''What a round trip through RGBE is expected to give back.'''
+    return rgbe_to_float(float_to_rgbe(pixels))
+
+
+def write_raw(path, resolution, rgbe_rows, rle=True):
+    '''Write RGBE scanlines, already in file order, under a custom resolution string.'''
+    with open(path, 'wb') as f:
+        f.write(HEADER + resolution.encode() + b'\n')
+        f.write(_encode_rle_rows(rgbe_rows).tobytes() if rle else rgbe_rows.tobytes())
+
+
+def pixel_bytes(path):
+    with open(path, 'rb') as f:
+        read_hdr_header(f)
+        return len(f.read())
+
+
+def test_round_trip_random(tmp_path):
+    pixels = random_hdr(150, 97)
+    path = tmp_path / 'random.hdr'
+    write_hdr(str(path), pixels, rows_per_chunk=64)
+    result = read_hdr(str(path))
+    assert np.array_equal(result, quantized(pixels))
+    # RGBE keeps 8 bits of mantissa relative to the brightest channel
+    assert np.all(np.abs(result - pixels) <= pixels.max(axis=-1, keepdims=True) / 128)
+
+
+def test_round_trip_long_runs(tmp_path):
+    # Constant spans longer than a 127 byte run, mixed with noise and short repeats
+    pixels = np.ones((40, 1000, 3), np.float32)
+    pixels[:, 300:700] = [4.0, 0.5, 0.25]
+    pixels[:, 700:] = random_hdr(40, 300)
+    pixels[:, 10:13] = 2.0
+    path = tmp_path / 'runs.hdr'
+    write_hdr(str(path), pixels)
+    assert np.array_equal(read_hdr(str(path)), quantized(pixels))
+    assert pixel_bytes(path) < pixels.shape[0] * pixels.shape[1] * 4 // 2
+
+
+@pytest.mark.parametrize('width', [1, 5, 7, RLE_MAX_WIDTH + 1])
+def test_round_trip_flat_widths(tmp_path, width):
+    # Widths outside the run-length range are stored as flat RGBE texels
+    pixels = random_hdr(3, width)
+    path = tmp_path / 'flat.hdr'
+    write_hdr(str(path), pixels)
+    assert pixel_bytes(path) == 3 * width * 4
+    assert np.array_equal(read_hdr(str(path)), quantized(pixels))
+
+
+@pytest.mark.parametrize('rle', [True, False])
+def test_read_bottom_up_file(tmp_path, rle):
+    pixels = random_hdr(70, 9 if rle else 6)
+    h, w = pixels.shape[:2]
+    path = tmp_path / 'bottom_up.hdr'
+    write_raw(path, f"+Y {h} +X {w}", float_to_rgbe(pixels[::-1]), rle)
+    assert np.array_equal(read_hdr(str(path)), quantized(pixels))
+
+
+@pytest.mark.parametrize('rle', [True, False])
+def test_read_right_to_left_file(tmp_path, rle):
+    pixels = random_hdr(70, 9 if rle else 6)
+    h, w = pixels.shape[:2]
+    path = tmp_path / 'right_to_left.hdr'
+    write_raw(path, f"-Y {h} -X {w}", float_to_rgbe(pixels[:, ::-1]), rle)
+    assert np.array_equal(read_hdr(str(path)), quantized(pixels))
+
+
+def test_transposed_file_is_rejected(tmp_path):
+    path = tmp_path / 'transposed.hdr'
+    write_raw(path, "+X 9 -Y 9", float_to_rgbe(random_hdr(9, 9)))
+    with pytest.raises(ValueError):
+        read_hdr(str(path))
+
+
+@pytest.mark.parametrize('resolution', ['-Y', '+Y'])
+@pytest.mark.parametrize('max_width', [130, 129, 65, 50, 13])
+def test_max_width_matches_strided_full_read(tmp_path, resolution, max_width):
+    # Taller than one streamed chunk, so strides cross chunk boundaries
+    pixels = random_hdr(150, 130)
+    h, w = pixels.shape[:2]
+    rows = pixels[::-1] if resolution == '+Y' else pixels
+    path = tmp_path / 'strided.hdr'
+    write_raw(path, f"{resolution} {h} +X {w}", float_to_rgbe(rows))
+
+    full = read_hdr(str(path))
+    stride = -(-w // max_width)
+    result = read_hdr(str(path), max_width=max_width)
+    assert result.shape[1] <= max_width
+    assert np.array_equal(result, full[::stride, ::stride])
@@ -0,0 +1,72 @@
+import multiprocessing
+import os
+from collections import Counter
+
+import pytest
+
+from BlenderCubemapConverter.workqueue import WorkQueue
+
+LEASE_SECONDS = 1
+N_JOBS = 24
+N_WORKERS = 4
+
+
+def handler(root, job, lease, crash):
+    if crash:
+        # Die mid-job without releasing the lease or cleaning up
+        os._exit(1)
+    out_dir = os.path.join(root, 'out')
+    path = os.path.join(out_dir, job['name'])
+    staged = f"{path}.{os.getpid()}.staging"
+    with open(staged, 'w') as f:
+        f.write(str(os.getpid()))
+    committed = lease.commit([(staged, path)])
+    # O_APPEND writes of one short line don't interleave between processes
+    with open(os.path.join(root, 'commits.log'), 'a') as f:
+        f.write(job['name'] + '\n')
+    return committed
+
+
+def worker(root, worker_id, crash=False):
+    queue = WorkQueue(root, lease_seconds=LEASE_SECONDS)
+    queue.run_worker(lambda job, lease: handler(root, job, lease, crash),
+                     worker_id=worker_id, poll_seconds=0.1)
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(),
+                    reason="workers inherit the test's imports through fork")
+def test_every_job_runs_once_despite_a_crashed_worker(tmp_path):
+    root = str(tmp_path)
+    os.makedirs(os.path.join(root, 'out'))
+    queue = WorkQueue(root, lease_seconds=LEASE_SECONDS)
+    job_ids = queue.submit([{'name': f"img{n}.exr"} for n in range(N_JOBS)])
+
+    ctx = multiprocessing.get_context('fork')
+    crashed = ctx.Process(target=worker, args=(root, 'crash', True))
+    crashed.start()
+    crashed.join(30)
+    assert crashed.exitcode == 1
+    # The crashed worker's claim is left behind until its lease expires
+    assert len(os.listdir(os.path.join(root, 'claims'))) == 1
+
+    workers = [ctx.Process(target=worker, args=(root, f"w{i}")) for i in range(N_WORKERS)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join(60)
+        assert p.exitcode == 0
+
+    records = queue.results()
+    assert sorted(r['job'] for r in records) == sorted(job_ids)
+    assert all(r['status'] == 'done' for r in records)
+    assert sorted(name[:-5] for name in os.listdir(os.path.join(root, 'done'))) == sorted(job_ids)
+    assert not queue.pending()
+
+    commits = Counter(open(os.path.join(root, 'commits.log')).read().split())
+    assert commits == Counter(f"img{n}.exr" for n in range(N_JOBS))
+    assert sorted(os.listdir(os.path.join(root, 'out'))) == sorted(commits)
+
+    leftovers = [name for _, _, names in os.walk(root) for name in names
+                 if name.endswith(('.staging', '.stale'))]
+    assert not leftovers
+    assert not os.listdir(os.path.join(root, 'claims'))